@@ -1 +1,6 @@
-from .remap import XRemapGUI
+def __getattr__(name):
+    # Tk is only imported when the GUI is actually requested, so the CLI can run without a display.
+    if name == "XRemapGUI":
+        from .remap import XRemapGUI
+        return XRemapGUI
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
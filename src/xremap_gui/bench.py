@@ -0,0 +1,120 @@
+import os
+import random
+import tempfile
+
+from .bundle import Bundle, export_profiles
+from .compiler import compile_profiles
+from .devices import parse_libinput_devices
+from .keys import TK_KEYSYMS, format_combo, keysym_to_evdev, parse_combo
+from .layers import build_profile, validate_profile
+from .remap_list import RemapRows, pairs_to_remap
+from .store import ProfileStore, dump_yaml, load_yaml
+from .timing import Timings
+from .windows import parse_wmctrl_classes
+
+MODIFIER_SETS = ["", "Ctrl+", "Alt+", "Shift+", "Super+", "Ctrl+Alt+", "Ctrl+Shift+", "Alt+Shift+"]
+
+def synthetic_libinput_output(count):
+    blocks = []
+    for i in range(count):
+        kind = ("Keyboard", "keyboard"), ("Mouse", "pointer"), ("Touchpad", "pointer gesture"), ("Power Button", "keyboard")
+        name, caps = kind[i % len(kind)]
+        blocks.append(f"Device:           Vendor {i // len(kind)} {name}\n"
+                      f"Kernel:           /dev/input/event{i}\n"
+                      f"Group:            {i}\n"
+                      f"Capabilities:     {caps}\n")
+    return "\n".join(blocks)
+
+def synthetic_wmctrl_output(count):
+    return "\n".join(f"0x{0x3c00000 + i:08x}  0 app{i % 40}.App{i % 40}  host  Window {i}" for i in range(count))
+
+def synthetic_rows(count, seed=0):
+    rng = random.Random(seed)
+    keysyms = [chr(c) for c in range(ord("a"), ord("z") + 1)] + [f"F{i}" for i in range(1, 13)] + TK_KEYSYMS.split()[::2]
+    return [(rng.choice(MODIFIER_SETS) + rng.choice(keysyms), rng.choice(MODIFIER_SETS) + rng.choice(keysyms))
+            for _ in range(count)]
+
+def profile_from_rows(name, rows):
+    return {"keymap": [{"name": name, "remap": pairs_to_remap(rows)}]}
+
+def layered_profile(name, rows, layers):
+    # Each layer gets its own toggle key and a share of the rows.
+    per_layer = max(len(rows) // (layers + 1), 1)
+    return build_profile(name, None, pairs_to_remap(rows[:per_layer]),
+                         [(f"layer{i}", format_combo(f"{MODIFIER_SETS[i // 12 % len(MODIFIER_SETS)]}F{i % 12 + 1}"),
+                           pairs_to_remap(rows[(i + 1) * per_layer:(i + 2) * per_layer])) for i in range(layers)])
+
+def bench_layouts(timings, profiles, repeat, rows=50):
+    # Cold start from the profiles directory against a bundle of the same profiles.
+    with tempfile.TemporaryDirectory() as root:
+        profiles_dir = os.path.join(root, "profiles")
+        os.mkdir(profiles_dir)
+        store = ProfileStore(profiles_dir)
+        text = dump_yaml(profile_from_rows("bench", synthetic_rows(rows)))
+        for i in range(profiles):
+            store.save_text(f"profile-{i:04d}", text, [f"input:0003:046d:{i:04x}:usb-0000:00:14.0-{i}/input0"])
+        bundle_path = os.path.join(root, "profiles.xrgb")
+        export_profiles(store, bundle_path)
+        selected = f"profile-{profiles // 2:04d}"
+        for _ in range(repeat):
+            with timings.span("layout.dir_list"):
+                store = ProfileStore(profiles_dir)
+                store.names()
+            with timings.span("layout.dir_select"):
+                store.read(selected)
+            with timings.span("layout.dir_parse_all"):
+                for name in store.names():
+                    load_yaml(store.read_text(name))
+            with timings.span("layout.bundle_list"):
+                bundle = Bundle(bundle_path)
+                bundle.names()
+            with timings.span("layout.bundle_select"):
+                load_yaml(bundle.read_text(selected))
+            bundle.close()
+
+def run_benchmarks(rows=10000, devices=64, windows=200, repeat=5, profiles=300, layers=40):
+    timings = Timings()
+    libinput_output = synthetic_libinput_output(devices)
+    wmctrl_output = synthetic_wmctrl_output(windows)
+    pairs = synthetic_rows(rows)
+    # A similar profile: 1% of the bindings differ and the order is shuffled.
+    other_pairs = synthetic_rows(rows // 100, seed=1) + pairs[rows // 100:]
+    random.Random(2).shuffle(other_pairs)
+    layered = layered_profile("bench", pairs, layers)
+    with tempfile.TemporaryDirectory() as profiles_dir:
+        for _ in range(repeat):
+            with timings.span("devices.parse"):
+                parse_libinput_devices(libinput_output)
+            with timings.span("windows.parse"):
+                parse_wmctrl_classes(wmctrl_output)
+            format_combo.cache_clear()
+            keysym_to_evdev.cache_clear()
+            with timings.span("keys.format"):
+                profile = profile_from_rows("bench", pairs)
+            with timings.span("keys.format_cached"):
+                profile_from_rows("bench", pairs)
+            parse_combo.cache_clear()
+            with timings.span("keys.parse"):
+                for combo in profile["keymap"][0]["remap"]:
+                    parse_combo(combo)
+            store = ProfileStore(profiles_dir)
+            with timings.span("store.save"):
+                store.save("bench", profile, ["input:0003:046d:c52b:usb-0000:00:14.0-1/input0"])
+            store = ProfileStore(profiles_dir)
+            with timings.span("store.read"):
+                store.read("bench")
+            with timings.span("store.read_cached"):
+                store.read("bench")
+            model = RemapRows()
+            model.sync(pairs)
+            with timings.span("rows.switch"):
+                model.sync(other_pairs)
+            with timings.span("rows.modified"):
+                model.modified()
+            with timings.span("layers.validate"):
+                validate_profile(layered)
+            with timings.span("compiler.merge"):
+                compile_profiles([("bench", profile, []), ("other", profile_from_rows("other", other_pairs), [])])
+    if profiles:
+        bench_layouts(timings, profiles, repeat)
+    return timings
@@ -0,0 +1,137 @@
+import json
+import struct
+import zlib
+
+from .fsutil import atomic_write
+
+# Layout: header, table of contents, then one zlib-compressed YAML blob per profile. Blob offsets are
+# relative to the end of the table, so listing a bundle reads only the first few kilobytes.
+MAGIC = b"XRGB"
+VERSION = 1
+BUNDLE_SUFFIX = ".xrgb"
+HEADER = struct.Struct("<4sHII")
+ENTRY = struct.Struct("<QIIIH")
+NAME_LENGTH = struct.Struct("<H")
+COMPRESS_LEVEL = 6
+
+class BundleError(ValueError):
+    pass
+
+def write_bundle(path, profiles):
+    # profiles: iterable of (name, yaml_text, devices).
+    toc = []
+    blobs = []
+    offset = 0
+    for name, text, devices in profiles:
+        raw = text.encode()
+        blob = zlib.compress(raw, COMPRESS_LEVEL)
+        encoded_name = name.encode()
+        encoded_devices = json.dumps(devices, separators=(",", ":")).encode()
+        toc.append(NAME_LENGTH.pack(len(encoded_name)) + encoded_name +
+                   ENTRY.pack(offset, len(blob), len(raw), zlib.crc32(raw), len(encoded_devices)) + encoded_devices)
+        blobs.append(blob)
+        offset += len(blob)
+    toc_data = b"".join(toc)
+    atomic_write(path, HEADER.pack(MAGIC, VERSION, len(toc), len(toc_data)) + toc_data + b"".join(blobs))
+    return len(toc)
+
+class Bundle:
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+        self.file = open(path, "rb")
+        try:
+            self._read_index()
+        except BaseException:
+            self.file.close()
+            raise
+
+    def _read_index(self):
+        header = self.file.read(HEADER.size)
+        if len(header) < HEADER.size:
+            raise BundleError(f"{self.path}: not a profile bundle")
+        magic, version, count, toc_size = HEADER.unpack(header)
+        if magic != MAGIC:
+            raise BundleError(f"{self.path}: not a profile bundle")
+        if version != VERSION:
+            raise BundleError(f"{self.path}: unsupported bundle version {version}")
+        toc = self.file.read(toc_size)
+        if len(toc) < toc_size:
+            raise BundleError(f"{self.path}: truncated table of contents")
+        self.data_offset = HEADER.size + toc_size
+        position = 0
+        try:
+            for _ in range(count):
+                (name_length,) = NAME_LENGTH.unpack_from(toc, position)
+                position += NAME_LENGTH.size
+                name = toc[position:position + name_length].decode()
+                position += name_length
+                offset, length, raw_length, crc, devices_length = ENTRY.unpack_from(toc, position)
+                position += ENTRY.size
+                devices = toc[position:position + devices_length]
+                position += devices_length
+                self.entries[name] = (offset, length, raw_length, crc, devices)
+        except (struct.error, UnicodeDecodeError) as e:
+            raise BundleError(f"{self.path}: corrupt table of contents") from e
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.file.close()
+
+    def __contains__(self, name):
+        return name in self.entries
+
+    def names(self):
+        return sorted(self.entries)
+
+    def devices(self, name):
+        try:
+            devices = json.loads(self.entries[name][4])
+        except ValueError as e:
+            raise BundleError(f"{self.path}: device list of '{name}' is corrupt") from e
+        if not isinstance(devices, list) or not all(isinstance(device, str) for device in devices):
+            raise BundleError(f"{self.path}: device list of '{name}' is corrupt")
+        return devices
+
+    def read_text(self, name):
+        offset, length, raw_length, crc, _ = self.entries[name]
+        self.file.seek(self.data_offset + offset)
+        try:
+            raw = zlib.decompress(self.file.read(length))
+        except zlib.error as e:
+            raise BundleError(f"{self.path}: profile '{name}' is corrupt") from e
+        if len(raw) != raw_length or zlib.crc32(raw) != crc:
+            raise BundleError(f"{self.path}: profile '{name}' is corrupt")
+        return raw.decode()
+
+def valid_name(name):
+    # Names become file names in the profiles directory.
+    return bool(name) and "/" not in name and "\0" not in name and not name.startswith(".")
+
+def export_profiles(store, path, names=None):
+    def profiles():
+        for name in names or store.names():
+            yield name, store.read_text(name), store.devices(name)
+    return write_bundle(path, profiles())
+
+def import_profiles(store, path, names=None, overwrite=False):
+    # Returns the imported names and the ones skipped because a profile of that name already exists.
+    imported = []
+    skipped = []
+    with Bundle(path) as bundle:
+        for name in names or bundle.names():
+            if name not in bundle:
+                raise BundleError(f"{path}: no profile named '{name}'")
+            if not valid_name(name):
+                raise BundleError(f"{path}: invalid profile name '{name}'")
+            if name in store and not overwrite:
+                skipped.append(name)
+                continue
+            store.save_text(name, bundle.read_text(name), bundle.devices(name))
+            imported.append(name)
+    return imported, skipped
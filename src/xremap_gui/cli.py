@@ -0,0 +1,258 @@
+import argparse
+import os
+import signal
+import subprocess
+import sys
+import time
+
+from .devices import DeviceIndex
+from .fsutil import atomic_write
+from .paths import DEVICES_FILE, LAST_PROFILE_FILE, PID_FILE, PROFILES_DIR, SESSIONS_DIR, ensure_dirs
+from .sessions import MAIN_SESSION, SessionStatus, device_conflicts, format_status, wait_all
+from .store import ProfileStore
+from .supervisor import STOP_TIMEOUT, xremap_command
+
+def read_pid(pid_file=PID_FILE):
+    try:
+        with open(pid_file, "r") as f:
+            pid = int(f.read().strip())
+        with open(f"/proc/{pid}/cmdline", "rb") as f:
+            if b"xremap" not in f.read():
+                return None
+    except (OSError, ValueError):
+        return None
+    return pid
+
+def session_devices(pid):
+    try:
+        with open(f"/proc/{pid}/cmdline", "rb") as f:
+            args = f.read().split(b"\0")
+    except OSError:
+        return []
+    return [args[i + 1].decode(errors="replace") for i in range(len(args) - 1) if args[i] == b"--device"]
+
+def session_pid_files():
+    # One pid file per profile started by 'apply'; xremap.pid is left by versions that ran a single instance.
+    files = {}
+    try:
+        entries = sorted(os.listdir(SESSIONS_DIR))
+    except FileNotFoundError:
+        entries = []
+    for entry in entries:
+        if entry.endswith(".pid"):
+            files[entry[:-len(".pid")]] = f"{SESSIONS_DIR}/{entry}"
+    if os.path.exists(PID_FILE):
+        files.setdefault(MAIN_SESSION, PID_FILE)
+    return files
+
+def pid_alive(pid):
+    # A process that exited but was not reaped yet keeps its pid; its command line is empty.
+    try:
+        with open(f"/proc/{pid}/cmdline", "rb") as f:
+            return bool(f.read())
+    except OSError:
+        return False
+
+def stop_xremap(pid_files=(PID_FILE,), timeout=STOP_TIMEOUT):
+    # Every instance is signalled before waiting, and all of them share one deadline.
+    pids = []
+    for pid_file in pid_files:
+        pid = read_pid(pid_file)
+        if pid is not None:
+            try:
+                os.kill(pid, signal.SIGTERM)
+                pids.append(pid)
+            except ProcessLookupError:
+                pass
+        try:
+            os.remove(pid_file)
+        except FileNotFoundError:
+            pass
+    stopped = len(pids)
+    deadline = time.monotonic() + timeout
+    while pids and time.monotonic() < deadline:
+        time.sleep(0.05)
+        pids = [pid for pid in pids if pid_alive(pid)]
+    for pid in pids:
+        try:
+            os.kill(pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+    return stopped
+
+def stop_started(started):
+    # Undoes a partial 'apply'. The Popen objects are used rather than the pid files, since an instance
+    # started a moment ago may not have exec'd xremap yet.
+    procs = []
+    for pid_file, proc in started:
+        try:
+            proc.terminate()
+            procs.append(proc)
+        except OSError:
+            pass
+        try:
+            os.remove(pid_file)
+        except FileNotFoundError:
+            pass
+    wait_all(procs)
+
+def cmd_list(args):
+    store = ProfileStore(PROFILES_DIR, DEVICES_FILE, LAST_PROFILE_FILE)
+    last_profile = store.last_profile()
+    for name in store.names():
+        print(f"{'*' if name == last_profile else ' '} {name}")
+    return 0
+
+def cmd_apply(args):
+    ensure_dirs()
+    store = ProfileStore(PROFILES_DIR, DEVICES_FILE, LAST_PROFILE_FILE)
+    names = args.profiles or [store.last_profile()]
+    index = DeviceIndex()
+    groups = []
+    for name in names:
+        if not name or name not in store:
+            print(f"xremap-gui: profile '{name}' not found", file=sys.stderr)
+            return 1
+        device_paths = index.device_paths(store.devices(name))
+        if not device_paths:
+            print(f"xremap-gui: no valid devices found for '{name}'. Ensure you are in the 'input' group.", file=sys.stderr)
+            return 1
+        groups.append((name, device_paths))
+    running = session_pid_files()
+    if args.add:
+        replaced = [pid_file for name, pid_file in running.items() if name in names]
+        others = [(name, session_devices(pid)) for name, pid_file in running.items()
+                  if name not in names and (pid := read_pid(pid_file)) is not None]
+    else:
+        replaced = list(running.values())
+        others = []
+    conflicts = device_conflicts(others + groups)
+    if conflicts:
+        device, owner, name = conflicts[0]
+        print(f"xremap-gui: {device} is used by both '{owner}' and '{name}'", file=sys.stderr)
+        return 1
+    stop_xremap(replaced)
+    started = []
+    for name, device_paths in groups:
+        with open(f"{SESSIONS_DIR}/{name}.log", "ab") as log:
+            try:
+                proc = subprocess.Popen(xremap_command(store.path(name), device_paths), stdin=subprocess.DEVNULL,
+                                        stdout=log, stderr=subprocess.STDOUT, start_new_session=True)
+            except OSError as e:
+                print(f"xremap-gui: failed to start xremap for '{name}': {e}", file=sys.stderr)
+                stop_started(started)
+                return 1
+        pid_file = f"{SESSIONS_DIR}/{name}.pid"
+        atomic_write(pid_file, str(proc.pid))
+        started.append((pid_file, proc))
+    store.set_last_profile(names[0])
+    return 0
+
+def cmd_stop(args):
+    running = session_pid_files()
+    missing = [name for name in args.profiles if name not in running]
+    if missing:
+        print(f"xremap-gui: no session '{missing[0]}'", file=sys.stderr)
+        return 1
+    if not stop_xremap([running[name] for name in args.profiles] if args.profiles else running.values()):
+        print("xremap-gui: xremap is not running", file=sys.stderr)
+        return 1
+    return 0
+
+def cmd_status(args):
+    rows = []
+    for name, pid_file in session_pid_files().items():
+        pid = read_pid(pid_file)
+        try:
+            uptime = time.time() - os.path.getmtime(pid_file)
+        except OSError:
+            continue
+        rows.append(SessionStatus(name, "running" if pid else "exited", pid, uptime, 0,
+                                  session_devices(pid) if pid else [], ""))
+    if not rows:
+        print("xremap-gui: xremap is not running", file=sys.stderr)
+        return 1
+    print(format_status(rows))
+    return 0
+
+def cmd_export(args):
+    from .bundle import export_profiles
+    store = ProfileStore(PROFILES_DIR, DEVICES_FILE, LAST_PROFILE_FILE)
+    missing = [name for name in args.profiles if name not in store]
+    if missing:
+        print(f"xremap-gui: profile '{missing[0]}' not found", file=sys.stderr)
+        return 1
+    try:
+        count = export_profiles(store, args.file, args.profiles)
+    except OSError as e:
+        print(f"xremap-gui: failed to export profiles: {e}", file=sys.stderr)
+        return 1
+    print(f"Exported {count} profile{'s' if count != 1 else ''} to {args.file}")
+    return 0
+
+def cmd_import(args):
+    from .bundle import Bundle, BundleError, import_profiles
+    try:
+        if args.list:
+            with Bundle(args.file) as bundle:
+                for name in bundle.names():
+                    print(name)
+            return 0
+        ensure_dirs()
+        store = ProfileStore(PROFILES_DIR, DEVICES_FILE, LAST_PROFILE_FILE)
+        imported, skipped = import_profiles(store, args.file, args.profiles, args.overwrite)
+    except (OSError, BundleError) as e:
+        print(f"xremap-gui: failed to import profiles: {e}", file=sys.stderr)
+        return 1
+    print(f"Imported {len(imported)} profile{'s' if len(imported) != 1 else ''}")
+    if skipped:
+        print(f"xremap-gui: skipped existing profiles (use --overwrite): {', '.join(skipped)}", file=sys.stderr)
+    return 0
+
+def cmd_bench(args):
+    from .bench import run_benchmarks
+    timings = run_benchmarks(args.rows, args.devices, args.windows, args.repeat, args.profiles, args.layers)
+    print(timings.to_json() if args.json else timings.format_table())
+    return 0
+
+def cmd_gui(args):
+    from .remap import main as gui_main
+    gui_main(getattr(args, "timings", None))
+    return 0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="xremap-gui", description="Configure and apply xremap profiles.")
+    subparsers = parser.add_subparsers(dest="command")
+    gui_parser = subparsers.add_parser("gui", help="open the profile editor (default)")
+    gui_parser.add_argument("--timings", metavar="FILE", help="write timing spans as JSON to FILE on exit")
+    gui_parser.set_defaults(func=cmd_gui)
+    apply_parser = subparsers.add_parser("apply", help="start xremap in the background, one instance per profile")
+    apply_parser.add_argument("profiles", nargs="*", help="profile names (defaults to the last used profile)")
+    apply_parser.add_argument("--add", action="store_true", help="keep other running profiles instead of replacing them")
+    apply_parser.set_defaults(func=cmd_apply)
+    subparsers.add_parser("list", help="list saved profiles").set_defaults(func=cmd_list)
+    stop_parser = subparsers.add_parser("stop", help="stop xremap started by 'apply'")
+    stop_parser.add_argument("profiles", nargs="*", help="profiles to stop (default: all)")
+    stop_parser.set_defaults(func=cmd_stop)
+    subparsers.add_parser("status", help="show the xremap instances started by 'apply'").set_defaults(func=cmd_status)
+    export_parser = subparsers.add_parser("export", help="write profiles to a bundle file")
+    export_parser.add_argument("file", help="bundle to write")
+    export_parser.add_argument("profiles", nargs="*", help="profiles to export (default: all)")
+    export_parser.set_defaults(func=cmd_export)
+    import_parser = subparsers.add_parser("import", help="add profiles from a bundle file")
+    import_parser.add_argument("file", help="bundle to read")
+    import_parser.add_argument("profiles", nargs="*", help="profiles to import (default: all)")
+    import_parser.add_argument("--overwrite", action="store_true", help="replace profiles that already exist")
+    import_parser.add_argument("--list", action="store_true", help="only list the profiles in the bundle")
+    import_parser.set_defaults(func=cmd_import)
+    bench_parser = subparsers.add_parser("bench", help="time profile handling on synthetic data, without a display")
+    bench_parser.add_argument("--rows", type=int, default=10000, help="bindings per profile (default: 10000)")
+    bench_parser.add_argument("--devices", type=int, default=64, help="input devices (default: 64)")
+    bench_parser.add_argument("--windows", type=int, default=200, help="open windows (default: 200)")
+    bench_parser.add_argument("--profiles", type=int, default=300, help="profiles for the directory/bundle comparison (default: 300)")
+    bench_parser.add_argument("--layers", type=int, default=40, help="layers in the validated profile (default: 40)")
+    bench_parser.add_argument("--repeat", type=int, default=5, help="runs per measurement (default: 5)")
+    bench_parser.add_argument("--json", action="store_true", help="print results as JSON")
+    bench_parser.set_defaults(func=cmd_bench)
+    args = parser.parse_args(argv)
+    sys.exit(getattr(args, "func", cmd_gui)(args))
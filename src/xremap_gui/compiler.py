@@ -0,0 +1,88 @@
+from collections import namedtuple
+from functools import lru_cache
+
+MODIFIER_ALIASES = {
+    "C": "C", "CTRL": "C", "CONTROL": "C",
+    "S": "SHIFT", "SHIFT": "SHIFT",
+    "M": "M", "ALT": "M", "A": "M",
+    "SUPER": "SUPER", "WIN": "SUPER", "WINDOWS": "SUPER",
+}
+MODIFIER_ORDER = {"C": 0, "M": 1, "SHIFT": 2, "SUPER": 3}
+
+Conflict = namedtuple("Conflict", "combo scope first_profile first_target profile target")
+
+@lru_cache(maxsize=65536)
+def normalize_combo(combo):
+    parts = str(combo).strip().upper().split("-")
+    key = parts.pop()
+    mods = {MODIFIER_ALIASES.get(part[:-2] if part.endswith(("_L", "_R")) else part, part) for part in parts if part}
+    return "-".join(sorted(mods, key=lambda mod: (MODIFIER_ORDER.get(mod, len(MODIFIER_ORDER)), mod)) + [key])
+
+def keymap_scope(keymap):
+    application = keymap.get("application") or {}
+    for kind in ("only", "not"):
+        if kind in application:
+            apps = application[kind]
+            return (kind, tuple(sorted(apps if isinstance(apps, list) else [apps])))
+    return None
+
+def _target_key(target):
+    if isinstance(target, str):
+        return normalize_combo(target)
+    if isinstance(target, list):
+        return tuple(_target_key(t) for t in target)
+    return repr(target)
+
+def _scope_rank(scope):
+    return 2 if scope is None else 0 if scope[0] == "only" else 1
+
+def _with_devices(mapping, devices):
+    # A keymap or modmap that already names its devices is left as written.
+    if not devices or "device" in mapping:
+        return mapping
+    return dict(mapping, device={"only": list(devices)})
+
+def compile_profiles(profiles, resolve=None):
+    # profiles: (name, profile, device identities). Every keymap and modmap is limited to its own profile's
+    # devices, resolved to paths by resolve(); a profile without devices applies to all of them.
+    config = {"keymap": []}
+    modmaps = []
+    devices = []
+    seen_devices = set()
+    keymaps = []
+    bindings = {}
+    conflicts = []
+    for name, profile, profile_devices in profiles:
+        for device in profile_devices:
+            if device not in seen_devices:
+                seen_devices.add(device)
+                devices.append(device)
+        paths = resolve(profile_devices) if resolve is not None else list(profile_devices)
+        device_set = frozenset(paths)
+        modmaps.extend(_with_devices(modmap, paths) for modmap in profile.get("modmap") or [])
+        for keymap in profile.get("keymap") or []:
+            scope = keymap_scope(keymap)
+            mode = keymap.get("mode")
+            mode = tuple(mode) if isinstance(mode, list) else mode
+            keymap = _with_devices(keymap, paths)
+            keymaps.append((_scope_rank(scope), len(keymaps), dict(keymap, name=f"{name}: {keymap.get('name', name)}")))
+            for combo, target in (keymap.get("remap") or {}).items():
+                key = (scope, mode, normalize_combo(combo))
+                target_key = _target_key(target)
+                # Bindings only collide on a device both profiles read; an empty set stands for every device.
+                earlier = bindings.setdefault(key, [])
+                for first in earlier:
+                    if first[3] != target_key and (not first[4] or not device_set or first[4] & device_set):
+                        conflicts.append(Conflict(key[2], scope, first[0], first[2], name, target))
+                        break
+                earlier.append((name, combo, target, target_key, device_set))
+    # xremap applies the first keymap that matches, so app-specific keymaps must precede global ones.
+    config["keymap"] = [keymap for _, _, keymap in sorted(keymaps, key=lambda item: item[:2])]
+    if modmaps:
+        config["modmap"] = modmaps
+    return config, devices, conflicts
+
+def describe_conflict(conflict):
+    scope = "" if conflict.scope is None else f" [{conflict.scope[0]} {', '.join(conflict.scope[1])}]"
+    return (f"{conflict.combo}{scope}: '{conflict.first_profile}' → {conflict.first_target}, "
+            f"'{conflict.profile}' → {conflict.target}")
@@ -0,0 +1,216 @@
+import json
+import os
+import re
+import struct
+import subprocess
+
+from .fsutil import atomic_write
+
+DEV_INPUT_DIR = "/dev/input"
+SYS_INPUT_DIR = "/sys/class/input"
+LINK_DIRS = ("by-id", "by-path")
+EVENT_NAME_RE = re.compile(r"event\d+")
+
+LONG_BITS = struct.calcsize("l") * 8
+EV_KEY, EV_REL, EV_ABS = 1, 2, 3
+REL_X, REL_Y = 0, 1
+BTN_MISC, BTN_LEFT = 0x100, 0x110
+BTN_TOOL_PEN, BTN_TOOL_FINGER, BTN_TOUCH = 0x140, 0x145, 0x14a
+
+def should_include(name, caps):
+    name_lower = name.lower()
+    if "keyboard" in caps or "key" in caps:
+        return any(x in name_lower for x in ["keyboard", "key", "logitech"])
+    if "pointer" in caps:
+        return any(x in name_lower for x in ["mouse", "trackball", "touchpad", "logitech"])
+    if "touch" in caps or "tablet" in caps:
+        return "controller" in name_lower
+    return False
+
+def _add_device(devices, event_suffix_counter, device):
+    if not (device.get("include") and "name" in device and "event" in device):
+        return
+    base_name = device["name"]
+    event = device["event"]
+    count = event_suffix_counter.get(base_name, 0)
+    suffix = f" ({event})" if count == 0 else f" ({event}, #{count})"
+    device["display_name"] = base_name + suffix
+    event_suffix_counter[base_name] = count + 1
+    devices.append(device)
+
+def parse_libinput_devices(output):
+    devices = []
+    current_device = {}
+    event_suffix_counter = {}
+    for line in output.splitlines():
+        line = line.strip()
+        if line.startswith("Device:"):
+            _add_device(devices, event_suffix_counter, current_device)
+            current_device = {"name": line.split(":", 1)[1].strip(), "include": False}
+        elif line.startswith("Capabilities:") and "name" in current_device:
+            caps = line.split(":", 1)[1].strip().lower()
+            if should_include(current_device["name"], caps):
+                current_device["include"] = True
+        elif line.startswith("Kernel:"):
+            for p in line.split():
+                if p.startswith("/dev/input/event"):
+                    current_device["event"] = p.split("/")[-1]
+    _add_device(devices, event_suffix_counter, current_device)
+    return devices
+
+def _read_text(path):
+    try:
+        with open(path, "r") as f:
+            return f.read().strip()
+    except OSError:
+        return ""
+
+def _read_bitmap(path):
+    value = 0
+    for word in _read_text(path).split():
+        value = (value << LONG_BITS) | int(word, 16)
+    return value
+
+def _event_number(event):
+    digits = event[len("event"):]
+    return int(digits) if digits.isdigit() else -1
+
+def sysfs_capabilities(device_dir):
+    ev = _read_bitmap(f"{device_dir}/capabilities/ev")
+    keys = _read_bitmap(f"{device_dir}/capabilities/key") if ev >> EV_KEY & 1 else 0
+    caps = []
+    if keys & ((1 << BTN_MISC) - 2):
+        caps.append("keyboard")
+    if ev >> EV_REL & 1 and keys >> BTN_LEFT & 1:
+        rel = _read_bitmap(f"{device_dir}/capabilities/rel")
+        if rel >> REL_X & 1 and rel >> REL_Y & 1:
+            caps.append("pointer")
+    if ev >> EV_ABS & 1:
+        if keys >> BTN_TOOL_PEN & 1:
+            caps.append("tablet")
+        elif keys >> BTN_TOOL_FINGER & 1:
+            caps.append("pointer gesture")
+        elif keys >> BTN_TOUCH & 1:
+            caps.append("touch")
+    return " ".join(caps)
+
+def read_sysfs_device(event, sys_root=SYS_INPUT_DIR):
+    device_dir = f"{sys_root}/{event}/device"
+    name = _read_text(f"{device_dir}/name")
+    if not name:
+        return None
+    return {"name": name, "event": event, "include": should_include(name, sysfs_capabilities(device_dir))}
+
+def list_sysfs_input_devices(sys_root=SYS_INPUT_DIR):
+    try:
+        events = sorted((e for e in os.listdir(sys_root) if e.startswith("event")), key=_event_number)
+    except OSError:
+        return []
+    devices = []
+    event_suffix_counter = {}
+    for event in events:
+        device = read_sysfs_device(event, sys_root)
+        if device:
+            _add_device(devices, event_suffix_counter, device)
+    return devices
+
+def list_user_input_devices(fast=False):
+    if fast:
+        return list_sysfs_input_devices()
+    try:
+        output = subprocess.check_output(["libinput", "list-devices"], text=True, stderr=subprocess.DEVNULL)
+    except FileNotFoundError:
+        return list_sysfs_input_devices()
+    except subprocess.SubprocessError:
+        return []
+    return parse_libinput_devices(output)
+
+class DeviceIndex:
+    def __init__(self, dev_dir=DEV_INPUT_DIR, sys_root=SYS_INPUT_DIR, load=True):
+        self.dev_dir = dev_dir
+        self.sys_root = sys_root
+        self.by_identity = {}
+        self.by_event = {}
+        if load:
+            self.refresh()
+
+    def refresh(self):
+        aliases = {}
+        for link_dir in LINK_DIRS:
+            try:
+                links = sorted(os.listdir(f"{self.dev_dir}/{link_dir}"))
+            except OSError:
+                continue
+            for link in links:
+                try:
+                    target = os.path.basename(os.readlink(f"{self.dev_dir}/{link_dir}/{link}"))
+                except OSError:
+                    continue
+                if EVENT_NAME_RE.fullmatch(target):
+                    aliases.setdefault(target, []).append(f"{link_dir}:{link}")
+        try:
+            events = [e for e in os.listdir(self.sys_root) if EVENT_NAME_RE.fullmatch(e)]
+        except OSError:
+            events = []
+        for event in events:
+            device_dir = f"{self.sys_root}/{event}/device"
+            ids = [_read_text(f"{device_dir}/id/{field}") for field in ("bustype", "vendor", "product")]
+            if all(ids):
+                aliases.setdefault(event, []).append("input:" + ":".join(ids + [_read_text(f"{device_dir}/phys")]))
+        self.by_event = {event: names[0] for event, names in aliases.items()}
+        self.by_identity = {name: event for event, names in aliases.items() for name in names}
+
+    def identity(self, event):
+        return self.by_event.get(event, event)
+
+    def resolve(self, identity):
+        if EVENT_NAME_RE.fullmatch(identity):
+            return identity if os.path.exists(f"{self.dev_dir}/{identity}") else None
+        return self.by_identity.get(identity)
+
+    def lookup_all(self, identities):
+        # Like resolve_all, from the links read by the last refresh only; nothing is read from disk.
+        events = (identity if EVENT_NAME_RE.fullmatch(identity) else self.by_identity.get(identity) for identity in identities)
+        return [event for event in events if event]
+
+    def resolve_all(self, identities):
+        events = [self.resolve(identity) for identity in identities]
+        if None in events:
+            self.refresh()
+            events = [self.resolve(identity) for identity in identities]
+        return [event for event in events if event]
+
+    def device_paths(self, identities):
+        paths = (f"{self.dev_dir}/{event}" for event in self.resolve_all(identities))
+        return [path for path in paths if os.access(path, os.R_OK | os.W_OK)]
+
+def input_fingerprint(dev_dir=DEV_INPUT_DIR):
+    # hashlib loads OpenSSL (about 4 ms under -X importtime); only the device cache needs it.
+    import hashlib
+    digest = hashlib.sha1()
+    try:
+        with os.scandir(dev_dir) as entries:
+            nodes = sorted((e.name, e.inode(), e.stat(follow_symlinks=False).st_mtime_ns)
+                           for e in entries if e.name.startswith("event"))
+    except OSError:
+        return ""
+    for node in nodes:
+        digest.update(repr(node).encode())
+    return digest.hexdigest()
+
+def load_cached_devices(cache_file, dev_dir=DEV_INPUT_DIR):
+    try:
+        with open(cache_file, "r") as f:
+            cache = json.load(f)
+        return cache["devices"], cache["fingerprint"] == input_fingerprint(dev_dir)
+    except (OSError, ValueError, KeyError, TypeError):
+        return [], False
+
+def refresh_device_cache(cache_file, fast=False, dev_dir=DEV_INPUT_DIR):
+    fingerprint = input_fingerprint(dev_dir)
+    devices = list_user_input_devices(fast)
+    try:
+        atomic_write(cache_file, json.dumps({"fingerprint": fingerprint, "devices": devices}))
+    except OSError:
+        pass
+    return devices
@@ -0,0 +1,99 @@
+import re
+import subprocess
+import threading
+import time
+
+from .windows import query_wm_class
+
+ACTIVE_WINDOW_RE = re.compile(r"_NET_ACTIVE_WINDOW\(WINDOW\): window id # (0x[0-9a-fA-F]+)")
+
+def build_lookup_table(app_profiles):
+    # Keyed on the configured string as written: either "instance.class" or the class alone.
+    return {wm_class.lower(): profile for wm_class, profile in app_profiles.items()}
+
+class FocusTracker:
+    def __init__(self, on_switch, app_profiles=None, window_classes=None, source=None):
+        self.on_switch = on_switch
+        self.table = build_lookup_table(app_profiles or {})
+        self.window_classes = {int(win_id, 16): wm_class for win_id, wm_class in (window_classes or {}).items()}
+        self.source = source
+        self.current = None
+        self.last_latency = 0.0
+        self.proc = None
+        self.thread = None
+        self._stopped = threading.Event()
+
+    def set_profiles(self, app_profiles):
+        self.table = build_lookup_table(app_profiles)
+
+    def lookup(self, wm_class):
+        if not wm_class:
+            return None
+        table = self.table
+        key = wm_class.lower()
+        if key in table:
+            return table[key]
+        # The class alone. Classes may contain dots themselves (org.gnome.Nautilus), so every suffix after
+        # a dot is a candidate and the longest one configured wins; the instance is never matched by itself.
+        start = key.find(".")
+        while start >= 0:
+            profile = table.get(key[start + 1:])
+            if profile is not None:
+                return profile
+            start = key.find(".", start + 1)
+        return None
+
+    def start(self):
+        source = self.source
+        if source is None:
+            try:
+                self.proc = subprocess.Popen(["xprop", "-spy", "-root", "_NET_ACTIVE_WINDOW"], stdin=subprocess.DEVNULL,
+                                             stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+            except OSError:
+                return False
+            source = self.proc.stdout
+        self._stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, args=(source, self._stopped, self.proc is not None),
+                                       daemon=True)
+        self.thread.start()
+        return True
+
+    def stop(self):
+        # Not joined: on_switch may be waiting on the Tk thread, which is usually the caller. Lines read
+        # after this are dropped, and the thread closes xprop's pipe itself once it sees end of file.
+        self._stopped.set()
+        if self.proc is not None:
+            self.proc.terminate()
+            self.proc.wait()
+            self.proc = None
+        self.thread = None
+
+    def _run(self, source, stopped, owned):
+        try:
+            for line in source:
+                if stopped.is_set():
+                    break
+                self.handle_line(line, stopped)
+        finally:
+            if owned:
+                source.close()
+
+    def handle_line(self, line, stopped=None):
+        started = time.perf_counter()
+        match = ACTIVE_WINDOW_RE.search(line)
+        if not match:
+            return
+        win_id = int(match.group(1), 16)
+        if not win_id:
+            return
+        wm_class = self.window_classes.get(win_id)
+        if wm_class is None:
+            wm_class = query_wm_class(hex(win_id))
+            if wm_class:
+                self.window_classes[win_id] = wm_class
+        profile = self.lookup(wm_class)
+        if profile == self.current or (stopped or self._stopped).is_set():
+            return
+        self.current = profile
+        self.on_switch(profile, wm_class)
+        self.last_latency = time.perf_counter() - started
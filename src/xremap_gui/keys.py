@@ -0,0 +1,138 @@
+from functools import lru_cache
+
+# Linux input-event-codes.h key names, indexed by code ("-" marks unassigned codes).
+EVDEV_KEY_NAMES = """
+RESERVED ESC 1 2 3 4 5 6 7 8 9 0 MINUS EQUAL BACKSPACE TAB Q W E R T Y U I O P LEFTBRACE RIGHTBRACE ENTER LEFTCTRL
+A S D F G H J K L SEMICOLON APOSTROPHE GRAVE LEFTSHIFT BACKSLASH Z X C V B N M COMMA DOT SLASH RIGHTSHIFT KPASTERISK
+LEFTALT SPACE CAPSLOCK F1 F2 F3 F4 F5 F6 F7 F8 F9 F10 NUMLOCK SCROLLLOCK KP7 KP8 KP9 KPMINUS KP4 KP5 KP6 KPPLUS KP1
+KP2 KP3 KP0 KPDOT - ZENKAKUHANKAKU 102ND F11 F12 RO KATAKANA HIRAGANA HENKAN KATAKANAHIRAGANA MUHENKAN KPJPCOMMA
+KPENTER RIGHTCTRL KPSLASH SYSRQ RIGHTALT LINEFEED HOME UP PAGEUP LEFT RIGHT END DOWN PAGEDOWN INSERT DELETE MACRO MUTE
+VOLUMEDOWN VOLUMEUP POWER KPEQUAL KPPLUSMINUS PAUSE SCALE KPCOMMA HANGEUL HANJA YEN LEFTMETA RIGHTMETA COMPOSE STOP
+AGAIN PROPS UNDO FRONT COPY OPEN PASTE FIND CUT HELP MENU CALC SETUP SLEEP WAKEUP FILE SENDFILE DELETEFILE XFER PROG1
+PROG2 WWW MSDOS SCREENLOCK ROTATE_DISPLAY CYCLEWINDOWS MAIL BOOKMARKS COMPUTER BACK FORWARD CLOSECD EJECTCD
+EJECTCLOSECD NEXTSONG PLAYPAUSE PREVIOUSSONG STOPCD RECORD REWIND PHONE ISO CONFIG HOMEPAGE REFRESH EXIT MOVE EDIT
+SCROLLUP SCROLLDOWN KPLEFTPAREN KPRIGHTPAREN NEW REDO F13 F14 F15 F16 F17 F18 F19 F20 F21 F22 F23 F24 - - - - -
+PLAYCD PAUSECD PROG3 PROG4 ALL_APPLICATIONS SUSPEND CLOSE PLAY FASTFORWARD BASSBOOST PRINT HP CAMERA SOUND QUESTION
+EMAIL CHAT SEARCH CONNECT FINANCE SPORT SHOP ALTERASE CANCEL BRIGHTNESSDOWN BRIGHTNESSUP MEDIA SWITCHVIDEOMODE
+KBDILLUMTOGGLE KBDILLUMDOWN KBDILLUMUP SEND REPLY FORWARDMAIL SAVE DOCUMENTS BATTERY BLUETOOTH WLAN UWB UNKNOWN
+VIDEO_NEXT VIDEO_PREV BRIGHTNESS_CYCLE BRIGHTNESS_AUTO DISPLAY_OFF WWAN RFKILL MICMUTE
+"""
+BTN_MOUSE = 0x110
+EVDEV_BUTTON_NAMES = "BTN_LEFT BTN_RIGHT BTN_MIDDLE BTN_SIDE BTN_EXTRA BTN_FORWARD BTN_BACK BTN_TASK"
+
+# Tk keysym -> evdev name, for keysyms whose name differs from the evdev one. The first keysym listed
+# for an evdev name is the one shown when a profile is loaded back into the editor.
+TK_KEYSYMS = """
+Escape ESC minus MINUS equal EQUAL BackSpace BACKSPACE Tab TAB ISO_Left_Tab TAB bracketleft LEFTBRACE
+bracketright RIGHTBRACE Return ENTER Control_L LEFTCTRL semicolon SEMICOLON apostrophe APOSTROPHE grave GRAVE
+dead_grave GRAVE Shift_L LEFTSHIFT backslash BACKSLASH comma COMMA period DOT slash SLASH Shift_R RIGHTSHIFT KP_Multiply KPASTERISK Alt_L LEFTALT
+Meta_L LEFTALT space SPACE Caps_Lock CAPSLOCK Num_Lock NUMLOCK Scroll_Lock SCROLLLOCK KP_7 KP7 KP_Home KP7
+KP_8 KP8 KP_Up KP8 KP_9 KP9 KP_Prior KP9 KP_Subtract KPMINUS KP_4 KP4 KP_Left KP4 KP_5 KP5 KP_Begin KP5
+KP_6 KP6 KP_Right KP6 KP_Add KPPLUS KP_1 KP1 KP_End KP1 KP_2 KP2 KP_Down KP2 KP_3 KP3 KP_Next KP3 KP_0 KP0
+KP_Insert KP0 KP_Decimal KPDOT KP_Delete KPDOT Zenkaku_Hankaku ZENKAKUHANKAKU Katakana KATAKANA Hiragana HIRAGANA
+Henkan HENKAN Henkan_Mode HENKAN Hiragana_Katakana KATAKANAHIRAGANA Muhenkan MUHENKAN KP_Enter KPENTER
+Control_R RIGHTCTRL KP_Divide KPSLASH Print SYSRQ Sys_Req SYSRQ Alt_R RIGHTALT ISO_Level3_Shift RIGHTALT
+Meta_R RIGHTALT Linefeed LINEFEED Home HOME Up UP Prior PAGEUP Page_Up PAGEUP Left LEFT Right RIGHT End END
+Down DOWN Next PAGEDOWN Page_Down PAGEDOWN Insert INSERT Delete DELETE XF86AudioMute MUTE
+XF86AudioLowerVolume VOLUMEDOWN XF86AudioRaiseVolume VOLUMEUP XF86PowerOff POWER KP_Equal KPEQUAL
+Pause PAUSE Break PAUSE KP_Separator KPCOMMA Hangul HANGEUL Hangul_Hanja HANJA yen YEN Super_L LEFTMETA
+Super_R RIGHTMETA Menu COMPOSE Cancel STOP Redo AGAIN Undo UNDO XF86Copy COPY XF86Open OPEN XF86Paste PASTE
+Find FIND XF86Cut CUT Help HELP XF86MenuKB MENU XF86Calculator CALC XF86Sleep SLEEP XF86WakeUp WAKEUP
+XF86Explorer FILE XF86Send SENDFILE XF86Xfer XFER XF86Launch1 PROG1 XF86Launch2 PROG2 XF86WWW WWW
+XF86ScreenSaver SCREENLOCK XF86RotateWindows ROTATE_DISPLAY XF86Mail MAIL XF86Favorites BOOKMARKS
+XF86MyComputer COMPUTER XF86Back BACK XF86Forward FORWARD XF86Eject EJECTCD XF86AudioNext NEXTSONG
+XF86AudioPlay PLAYPAUSE XF86AudioPrev PREVIOUSSONG XF86AudioStop STOPCD XF86AudioRecord RECORD
+XF86AudioRewind REWIND XF86Phone PHONE XF86Tools CONFIG XF86HomePage HOMEPAGE XF86Reload REFRESH
+XF86Refresh REFRESH XF86Close CLOSE XF86New NEW XF86ScrollUp SCROLLUP XF86ScrollDown SCROLLDOWN
+XF86Launch3 PROG3 XF86Launch4 PROG4 XF86Suspend SUSPEND XF86AudioPause PAUSECD XF86AudioForward FASTFORWARD
+XF86WebCam CAMERA XF86Search SEARCH XF86Shop SHOP XF86MonBrightnessDown BRIGHTNESSDOWN
+XF86MonBrightnessUp BRIGHTNESSUP XF86AudioMedia MEDIA XF86Display SWITCHVIDEOMODE XF86KbdLightOnOff KBDILLUMTOGGLE
+XF86KbdBrightnessDown KBDILLUMDOWN XF86KbdBrightnessUp KBDILLUMUP XF86Reply REPLY XF86MailForward FORWARDMAIL
+XF86Save SAVE XF86Documents DOCUMENTS XF86Battery BATTERY XF86Bluetooth BLUETOOTH XF86WLAN WLAN
+XF86MonBrightnessCycle BRIGHTNESS_CYCLE XF86WWAN WWAN XF86RFKill RFKILL XF86AudioMicMute MICMUTE
+Button1 BTN_LEFT Button2 BTN_MIDDLE Button3 BTN_RIGHT Button8 BTN_SIDE Button9 BTN_EXTRA
+"""
+# Shifted symbols, which Tk reports when Shift is held: they translate to the key underneath, but that
+# key is always shown by its unshifted keysym.
+TK_SHIFTED_KEYSYMS = """
+exclam 1 at 2 numbersign 3 dollar 4 percent 5 asciicircum 6 ampersand 7 asterisk 8 parenleft 9 parenright 0
+underscore MINUS plus EQUAL braceleft LEFTBRACE braceright RIGHTBRACE colon SEMICOLON quotedbl APOSTROPHE
+asciitilde GRAVE bar BACKSLASH less COMMA greater DOT question SLASH
+"""
+
+# Tk modifier label -> xremap modifier prefix.
+MODIFIERS = {"Ctrl": "C", "Alt": "M", "Shift": "Shift", "Super": "Super", "Meta": "Super"}
+# Any modifier spelling xremap (or older saves of this tool) may contain -> Tk modifier label.
+MODIFIER_LABELS = {
+    "C": "Ctrl", "CTRL": "Ctrl", "CONTROL": "Ctrl",
+    "M": "Alt", "ALT": "Alt", "A": "Alt",
+    "S": "Shift", "SHIFT": "Shift",
+    "SUPER": "Super", "WIN": "Super", "WINDOWS": "Super",
+}
+MODIFIER_ORDER = ("Ctrl", "Alt", "Shift", "Super")
+
+_tables = None
+
+def _load_tables():
+    global _tables
+    if _tables is None:
+        codes = {}
+        for code, name in enumerate(EVDEV_KEY_NAMES.split()):
+            if name != "-":
+                codes[name] = code
+        for offset, name in enumerate(EVDEV_BUTTON_NAMES.split()):
+            codes[name] = BTN_MOUSE + offset
+        pairs = TK_KEYSYMS.split()
+        to_keysym = {}
+        for keysym, name in zip(pairs[::2], pairs[1::2]):
+            to_keysym.setdefault(name, keysym)
+        shifted = TK_SHIFTED_KEYSYMS.split()
+        to_evdev = dict(zip(pairs[::2] + shifted[::2], pairs[1::2] + shifted[1::2]))
+        names = {code: name for name, code in codes.items()}
+        _tables = (codes, to_evdev, to_keysym, names)
+    return _tables
+
+def evdev_code(name):
+    name = name.upper()
+    if name.startswith("KEY_"):
+        name = name[4:]
+    return _load_tables()[0].get(name)
+
+def evdev_name(code):
+    return _load_tables()[3].get(code)
+
+@lru_cache(maxsize=None)
+def keysym_to_evdev(keysym):
+    codes, to_evdev, _, _ = _load_tables()
+    if keysym in to_evdev:
+        return to_evdev[keysym]
+    name = keysym.upper()
+    return name[4:] if name.startswith("KEY_") and name[4:] in codes else name
+
+@lru_cache(maxsize=None)
+def evdev_to_keysym(name):
+    codes, _, to_keysym, _ = _load_tables()
+    upper = name.upper()
+    if upper.startswith("KEY_") and upper[4:] in codes:
+        upper = upper[4:]
+    if upper in to_keysym:
+        return to_keysym[upper]
+    if upper in codes:
+        return upper.lower() if len(upper) == 1 and upper.isalpha() else upper
+    return name
+
+@lru_cache(maxsize=65536)
+def format_combo(combo):
+    parts = [part.strip() for part in combo.split("+")]
+    return "-".join([MODIFIERS.get(part) or keysym_to_evdev(part) for part in parts[:-1]] + [keysym_to_evdev(parts[-1])])
+
+@lru_cache(maxsize=65536)
+def parse_combo(combo):
+    parts = combo.strip().split("-")
+    key = parts.pop()
+    if not key and parts:
+        key = parts.pop() + "-"
+    labels = {MODIFIER_LABELS.get(part.upper()[:-2] if part.upper().endswith(("_L", "_R")) else part.upper()) for part in parts}
+    if None in labels:
+        return combo
+    return "+".join([label for label in MODIFIER_ORDER if label in labels] + [evdev_to_keysym(key)])
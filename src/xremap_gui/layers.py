@@ -0,0 +1,158 @@
+from collections import namedtuple
+
+from .compiler import keymap_scope, normalize_combo
+
+DEFAULT_MODE = "default"
+ANY_MODE = None
+
+Issue = namedtuple("Issue", "kind mode combo message")
+
+def set_mode_targets(target):
+    if isinstance(target, dict):
+        if "set_mode" in target:
+            yield str(target["set_mode"])
+    elif isinstance(target, list):
+        for action in target:
+            yield from set_mode_targets(action)
+
+def keymap_modes(keymap):
+    mode = keymap.get("mode")
+    if mode is None:
+        return (ANY_MODE,)
+    return tuple(str(m) for m in mode) if isinstance(mode, list) else (str(mode),)
+
+def split_layers(profile):
+    # Splits a profile into its base keymap, its layers and any keymaps the editor does not model.
+    # Layers are keymaps with a single mode; the base binding that enters a layer and the layer binding
+    # on the same combo that returns to the default mode become the layer's toggle key.
+    keymaps = [k for k in (profile.get("keymap") or []) if isinstance(k, dict)]
+    base = next((k for k in keymaps if "mode" not in k), None)
+    layer_maps = [k for k in keymaps if isinstance(k.get("mode"), str) and k.get("mode") != DEFAULT_MODE]
+    extra = [k for k in keymaps if k is not base and not any(k is l for l in layer_maps)]
+    layer_names = {k["mode"] for k in layer_maps}
+    base_remap = {}
+    toggles = {}
+    for combo, target in ((base or {}).get("remap") or {}).items():
+        if isinstance(target, dict) and len(target) == 1 and target.get("set_mode") in layer_names:
+            toggles.setdefault(target["set_mode"], combo)
+        else:
+            base_remap[combo] = target
+    layers = []
+    for keymap in layer_maps:
+        toggle = toggles.get(keymap["mode"])
+        remap = {}
+        for combo, target in (keymap.get("remap") or {}).items():
+            if combo == toggle and target == {"set_mode": DEFAULT_MODE}:
+                continue
+            remap[combo] = target
+        layers.append((keymap["mode"], toggle, remap))
+    return base or {}, base_remap, layers, extra
+
+def build_profile(name, application, base_remap, layers, extra=()):
+    # Layer keymaps precede the base one: xremap uses the first keymap that binds a key, and the
+    # mode-less base keymap is active in every mode.
+    keymaps = []
+    base_remap = dict(base_remap)
+    for layer, toggle, remap in layers:
+        keymap = {"name": f"{name} [{layer}]", "mode": layer}
+        if application:
+            keymap["application"] = {"only": application}
+        remap = dict(remap)
+        if toggle:
+            remap.setdefault(toggle, {"set_mode": DEFAULT_MODE})
+            base_remap.setdefault(toggle, {"set_mode": layer})
+        keymap["remap"] = remap
+        keymaps.append(keymap)
+    base = {"name": name}
+    if application:
+        base["application"] = {"only": application}
+    base["remap"] = base_remap
+    keymaps.append(base)
+    keymaps.extend(extra)
+    return {"keymap": keymaps}
+
+def toggle_collisions(base_remap, layers):
+    # build_profile never overwrites a binding with a toggle, so a toggle on a combo that is already
+    # taken is dropped from the profile; this reports those before the profile is built.
+    issues = []
+    base = {normalize_combo(combo) for combo in base_remap}
+    claimed = {}
+    for layer, toggle, remap in layers:
+        if not toggle:
+            continue
+        key = normalize_combo(toggle)
+        if key in base:
+            issues.append(Issue("toggle", layer, toggle,
+                                f"{toggle} is already bound in the base layer, so it does not switch to '{layer}'"))
+        elif key in claimed:
+            issues.append(Issue("toggle", layer, toggle,
+                                f"{toggle} is the toggle of both '{claimed[key]}' and '{layer}'; only '{claimed[key]}' gets it"))
+        else:
+            claimed[key] = layer
+        if any(normalize_combo(combo) == key for combo in remap):
+            issues.append(Issue("toggle", layer, toggle,
+                                f"{toggle} is bound in '{layer}', so it does not switch back to '{DEFAULT_MODE}'"))
+    return issues
+
+def validate_profile(profile, default_mode=None):
+    # One pass over the bindings builds the mode transition table and the shadowing index; reachability
+    # is a breadth-first search over that table. Both are linear in the number of bindings.
+    default_mode = default_mode or profile.get("default_mode") or DEFAULT_MODE
+    keymaps = [k for k in (profile.get("keymap") or []) if isinstance(k, dict)]
+    modes = {default_mode}
+    transitions = {}
+    any_transitions = set()
+    issues = []
+    any_first = {}
+    mode_first = {}
+    covered = {}
+    for keymap in keymaps:
+        modes.update(m for m in keymap_modes(keymap) if m is not ANY_MODE)
+    for keymap in keymaps:
+        scope = keymap_scope(keymap)
+        name = keymap.get("name", "")
+        active_modes = keymap_modes(keymap)
+        for combo, target in (keymap.get("remap") or {}).items():
+            for mode in set_mode_targets(target):
+                if mode not in modes:
+                    issues.append(Issue("undefined", keymap.get("mode"), combo,
+                                        f"{combo} in '{name}' switches to mode '{mode}', which has no bindings"))
+                for source in active_modes:
+                    if source is ANY_MODE:
+                        any_transitions.add(mode)
+                    else:
+                        transitions.setdefault(source, set()).add(mode)
+            key = (scope, normalize_combo(combo))
+            # A binding is shadowed when every mode it is active in already has an earlier binding for the combo.
+            shadowed_by = any_first.get(key)
+            if shadowed_by is None:
+                if ANY_MODE in active_modes:
+                    if len(covered.get(key, ())) == len(modes):
+                        shadowed_by = mode_first[key + (next(iter(covered[key])),)]
+                elif all(key + (m,) in mode_first for m in active_modes):
+                    shadowed_by = mode_first[key + (active_modes[0],)]
+            if shadowed_by is not None:
+                issues.append(Issue("shadowed", keymap.get("mode"), combo,
+                                    f"{combo} in '{name}' is shadowed by '{shadowed_by}'"))
+                continue
+            for mode in active_modes:
+                if mode is ANY_MODE:
+                    any_first[key] = name
+                else:
+                    mode_first.setdefault(key + (mode,), name)
+                    covered.setdefault(key, set()).add(mode)
+    reachable = {default_mode} | any_transitions
+    pending = list(reachable)
+    while pending:
+        for mode in transitions.get(pending.pop(), ()):
+            if mode not in reachable:
+                reachable.add(mode)
+                pending.append(mode)
+    for keymap in keymaps:
+        active_modes = keymap_modes(keymap)
+        if ANY_MODE in active_modes or any(m in reachable for m in active_modes):
+            continue
+        issues.append(Issue("dead", keymap.get("mode"), None,
+                            f"'{keymap.get('name', '')}' is never active: nothing switches to "
+                            f"{', '.join(repr(m) for m in active_modes)}"))
+    return issues
@@ -0,0 +1,223 @@
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from array import array
+
+from .keys import evdev_code, evdev_name
+
+# struct input_event: struct timeval, __u16 type, __u16 code, __s32 value.
+INPUT_EVENT = struct.Struct("llHHi")
+EV_SYN = 0x00
+EV_KEY = 0x01
+SYN_DROPPED = 3
+KEY_RELEASE, KEY_PRESS, KEY_REPEAT = 0, 1, 2
+READ_EVENTS = 256
+MAX_DELAY_US = 0xFFFFFFFF
+# Gaps shorter than this are left to xremap's own pacing instead of becoming sleep actions.
+MIN_SLEEP_US = 1000
+ACTIONS = {KEY_RELEASE: "release", KEY_PRESS: "press", KEY_REPEAT: "repeat"}
+ACTION_VALUES = {action: value for value, action in ACTIONS.items()}
+HEADER = struct.Struct("<4sI")
+MAGIC = b"XRMC"
+
+class Macro:
+    __slots__ = ("codes", "values", "delays")
+
+    def __init__(self, codes=(), values=(), delays=()):
+        self.codes = array("H", codes)
+        self.values = array("b", values)
+        # Microseconds since the previous event.
+        self.delays = array("I", delays)
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __eq__(self, other):
+        return isinstance(other, Macro) and (self.codes, self.values, self.delays) == (other.codes, other.values, other.delays)
+
+    def __hash__(self):
+        return hash((self.codes.tobytes(), self.values.tobytes(), self.delays.tobytes()))
+
+    def __str__(self):
+        return f"⏺ {sum(1 for v in self.values if v == KEY_PRESS)} keys, {self.duration_us / 1e6:.1f} s"
+
+    def __repr__(self):
+        return f"Macro({self.to_bytes().hex()})"
+
+    @property
+    def duration_us(self):
+        return sum(self.delays)
+
+    def append(self, code, value, delay_us):
+        self.codes.append(code)
+        self.values.append(value)
+        self.delays.append(min(max(int(delay_us), 0), MAX_DELAY_US))
+
+    def events(self):
+        return zip(self.codes, self.values, self.delays)
+
+    def to_bytes(self):
+        arrays = (self.codes, self.values, self.delays)
+        if sys.byteorder == "big":
+            arrays = [array(a.typecode, a) for a in arrays]
+            for a in arrays:
+                a.byteswap()
+        return HEADER.pack(MAGIC, len(self)) + b"".join(a.tobytes() for a in arrays)
+
+    @classmethod
+    def from_bytes(cls, data):
+        magic, count = HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ValueError("not a recorded macro")
+        macro = cls()
+        offset = HEADER.size
+        for a in (macro.codes, macro.values, macro.delays):
+            size = count * a.itemsize
+            a.frombytes(data[offset:offset + size])
+            offset += size
+            if sys.byteorder == "big":
+                a.byteswap()
+        if len(macro.delays) != count:
+            raise ValueError("truncated macro")
+        return macro
+
+    def to_sequence(self):
+        # xremap key sequence: press/release/repeat actions with sleeps (in ms) for the recorded gaps.
+        actions = []
+        pending_us = 0
+        for code, value, delay in self.events():
+            pending_us += delay
+            name = evdev_name(code)
+            if name is None or value not in ACTIONS:
+                continue
+            if actions and pending_us >= MIN_SLEEP_US:
+                actions.append({"sleep": round(pending_us / 1000)})
+            pending_us = 0
+            actions.append({ACTIONS[value]: name})
+        return actions
+
+    @classmethod
+    def from_sequence(cls, actions):
+        macro = cls()
+        delay = 0
+        for action in actions:
+            (kind, arg), = action.items()
+            if kind == "sleep":
+                delay += int(arg) * 1000
+                continue
+            code = evdev_code(str(arg))
+            if code is not None and kind in ACTION_VALUES:
+                macro.append(code, ACTION_VALUES[kind], delay)
+                delay = 0
+        return macro
+
+    def to_launch(self):
+        # Replays the macro through ydotool for setups where xremap's sequence actions are not wanted.
+        commands = []
+        batch = []
+        for code, value, delay in self.events():
+            if delay >= MIN_SLEEP_US and batch:
+                commands.append("ydotool key " + " ".join(batch))
+                batch = []
+            if delay >= MIN_SLEEP_US and commands:
+                commands.append(f"sleep {delay / 1e6:.3f}")
+            if value in (KEY_RELEASE, KEY_PRESS):
+                batch.append(f"{code}:{value}")
+        if batch:
+            commands.append("ydotool key " + " ".join(batch))
+        return {"launch": ["sh", "-c", "; ".join(commands)]}
+
+def is_macro_sequence(target):
+    return (isinstance(target, list) and bool(target) and
+            all(isinstance(a, dict) and len(a) == 1 and next(iter(a)) in ("press", "release", "repeat", "sleep") for a in target))
+
+def play(macro, sink, clock=time.monotonic, sleep=time.sleep):
+    # Events are due at their offset from the start, so time spent in sink() does not accumulate as drift.
+    started = clock()
+    due = 0.0
+    for code, value, delay in macro.events():
+        due += delay / 1e6
+        wait = started + due - clock()
+        if wait > 0:
+            sleep(wait)
+        sink(code, value)
+
+class MacroRecorder:
+    def __init__(self, device_path, keep_repeats=False):
+        self.device_path = device_path
+        self.keep_repeats = keep_repeats
+        self.macro = Macro()
+        self.dropped = 0
+        self.error = None
+        self.fd = -1
+        self.thread = None
+        self._wake_r = self._wake_w = -1
+
+    def start(self):
+        try:
+            self.fd = os.open(self.device_path, os.O_RDONLY | os.O_NONBLOCK | os.O_CLOEXEC)
+        except OSError as e:
+            self.error = e
+            return False
+        self._wake_r, self._wake_w = os.pipe()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        return True
+
+    def stop(self):
+        if self.thread is None:
+            return self.macro
+        os.write(self._wake_w, b"\0")
+        self.thread.join()
+        for fd in (self.fd, self._wake_r, self._wake_w):
+            os.close(fd)
+        self.thread = None
+        self.fd = self._wake_r = self._wake_w = -1
+        return self.macro
+
+    def _run(self):
+        pressed = set()
+        last_us = None
+        read_size = READ_EVENTS * INPUT_EVENT.size
+        macro = self.macro
+        while True:
+            readable, _, _ = select.select([self.fd, self._wake_r], [], [])
+            if self.fd in readable:
+                # Drain everything the kernel has buffered before checking for stop, so no event is lost.
+                while True:
+                    try:
+                        data = os.read(self.fd, read_size)
+                    except BlockingIOError:
+                        break
+                    except OSError as e:
+                        self.error = e
+                        data = b""
+                    if not data:
+                        readable = [self._wake_r]
+                        break
+                    for sec, usec, ev_type, code, value in INPUT_EVENT.iter_unpack(data):
+                        if ev_type == EV_SYN and code == SYN_DROPPED:
+                            self.dropped += 1
+                            continue
+                        if ev_type != EV_KEY:
+                            continue
+                        if value == KEY_RELEASE:
+                            # Releases of keys held down before recording started are not part of the macro.
+                            if code not in pressed:
+                                continue
+                            pressed.discard(code)
+                        elif value == KEY_PRESS:
+                            pressed.add(code)
+                        elif not self.keep_repeats:
+                            continue
+                        now_us = sec * 1000000 + usec
+                        macro.append(code, value, 0 if last_us is None else now_us - last_us)
+                        last_us = now_us
+            if self._wake_r in readable:
+                break
+        # Keys still down when recording stops would otherwise stay pressed on replay.
+        for code in pressed:
+            macro.append(code, KEY_RELEASE, 0)
@@ -0,0 +1,20 @@
+import os
+
+CONFIG_DIR = os.path.join(os.environ.get("XDG_CONFIG_HOME") or os.path.expanduser("~/.config"), "xremap_gui")
+PROFILES_DIR = f"{CONFIG_DIR}/profiles"
+DEVICES_FILE = f"{CONFIG_DIR}/devices.json"
+LAST_PROFILE_FILE = f"{CONFIG_DIR}/last_profile.txt"
+DEVICE_CACHE_FILE = f"{CONFIG_DIR}/device_cache.json"
+
+# Without a runtime dir the state goes under the user's cache dir rather than a shared, guessable /tmp path.
+RUNTIME_DIR = os.path.join(os.environ.get("XDG_RUNTIME_DIR") or os.environ.get("XDG_CACHE_HOME")
+                           or os.path.expanduser("~/.cache"), "xremap_gui")
+PID_FILE = f"{RUNTIME_DIR}/xremap.pid"
+ACTIVE_CONFIG = f"{RUNTIME_DIR}/active.yml"
+SESSIONS_DIR = f"{RUNTIME_DIR}/sessions"
+
+def ensure_dirs():
+    for directory in [CONFIG_DIR, PROFILES_DIR]:
+        os.makedirs(directory, exist_ok=True)
+    os.makedirs(RUNTIME_DIR, mode=0o700, exist_ok=True)
+    os.makedirs(SESSIONS_DIR, mode=0o700, exist_ok=True)
@@ -1,209 +1,77 @@
-import os
-import subprocess
+import queue
+import threading
+import time
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import filedialog, simpledialog, ttk, messagebox
 import yaml
-import json
-import re
-
-CONFIG_DIR = "/home/b/.config/xremap_gui"
-PROFILES_DIR = f"{CONFIG_DIR}/profiles"
-DEVICES_FILE = f"{CONFIG_DIR}/devices.json"
-LAST_PROFILE_FILE = f"{CONFIG_DIR}/last_profile.txt"
-
-for directory in [CONFIG_DIR, PROFILES_DIR]:
-    os.makedirs(directory, exist_ok=True)
-
-def list_user_input_devices():
-    try:
-        output = subprocess.check_output(["libinput", "list-devices"], text=True)
-        devices = []
-        current_device = {}
-        event_suffix_counter = {}
-        def should_include(name, caps):
-            name_lower = name.lower()
-            if "keyboard" in caps or "key" in caps:
-                return any(x in name_lower for x in ["keyboard", "key", "logitech"])
-            if "pointer" in caps:
-                return any(x in name_lower for x in ["mouse", "trackball", "touchpad", "logitech"])
-            if "touch" in caps or "tablet" in caps:
-                return "controller" in name_lower
-            return False
-        for line in output.splitlines():
-            line = line.strip()
-            if line.startswith("Device:"):
-                if current_device.get("include") and "name" in current_device and "event" in current_device:
-                    base_name = current_device["name"]
-                    event = current_device["event"]
-                    count = event_suffix_counter.get(base_name, 0)
-                    suffix = f" ({event})" if count == 0 else f" ({event}, #{count})"
-                    current_device["display_name"] = base_name + suffix
-                    event_suffix_counter[base_name] = count + 1
-                    devices.append(current_device)
-                current_device = {"name": line.split(":", 1)[1].strip(), "include": False}
-            elif line.startswith("Capabilities:"):
-                caps = line.split(":", 1)[1].strip().lower()
-                if should_include(current_device["name"], caps):
-                    current_device["include"] = True
-            elif line.startswith("Kernel:"):
-                parts = line.split()
-                for p in parts:
-                    if p.startswith("/dev/input/event"):
-                        current_device["event"] = p.split("/")[-1]
-        if current_device.get("include") and "name" in current_device and "event" in current_device:
-            base_name = current_device["name"]
-            event = current_device["event"]
-            count = event_suffix_counter.get(base_name, 0)
-            suffix = f" ({event})" if count == 0 else f" ({event}, #{count})"
-            current_device["display_name"] = base_name + suffix
-            devices.append(current_device)
-        return devices
-    except subprocess.SubprocessError:
-        return []
-
-class KeyRemap:
-    def __init__(self, parent, row, from_key="", to_key="", on_remove=None):
-        self.from_key = tk.StringVar(value=from_key)
-        self.to_key = tk.StringVar(value=to_key)
-        self.row = row
-        self.on_remove = on_remove
-        self.frame = tk.Frame(parent, bg="#2e2e2e")
-        self.frame.pack(fill="x", padx=30, pady=4, anchor="center")
-        self.from_button = tk.Button(
-            self.frame,
-            text=from_key,
-            width=10,
-            fg="white",
-            bg="#3c3f41",
-            activebackground="#5c5f61",
-            command=self.set_from_key
-        )
-        self.from_button.pack(side="left", padx=5)
-        tk.Label(self.frame, text="→", fg="white", bg="#2e2e2e").pack(side="left", padx=5)
-
-        self.to_button = tk.Button(
-            self.frame,
-            text=to_key,
-            width=10,
-            fg="white",
-            bg="#3c3f41",
-            activebackground="#5c5f61",
-            command=self.set_to_key
-        )
-        self.to_button.pack(side="left", padx=5)
-
-        tk.Button(self.frame, text="✖", width=1, fg="white", bg="red", command=self.remove).pack(side="left", padx=13)
-
-    def set_from_key(self):
-        self._capture_key(self.from_key, self.from_button)
-
-    def set_to_key(self):
-        self._capture_key(self.to_key, self.to_button)
-
-    def _capture_key(self, var, button):
-        original = var.get() or "key"
-        button.config(text="...")
-        pressed_modifiers = set()
-
-        def on_key_press(event):
-            if event.keysym in ("Shift_L", "Shift_R", "Control_L", "Control_R", "Alt_L", "Alt_R", "Meta_L", "Meta_R"):
-                pressed_modifiers.add(event.keysym)
-                return "break"
-            mods = []
-            if "Control_L" in pressed_modifiers or "Control_R" in pressed_modifiers:
-                mods.append("Ctrl")
-            if "Alt_L" in pressed_modifiers or "Alt_R" in pressed_modifiers:
-                mods.append("Alt")
-            if "Shift_L" in pressed_modifiers or "Shift_R" in pressed_modifiers:
-                mods.append("Shift")
-            if "Meta_L" in pressed_modifiers or "Meta_R" in pressed_modifiers:
-                mods.append("Meta")
-            combo = "+".join(mods + [event.keysym])
-            var.set(combo)
-            button.config(text=combo)
-            button.unbind("<KeyPress>")
-            button.unbind("<KeyRelease>")
-            button.bind("<Button-1>", lambda e: None)
-            button.bind("<Button-3>", lambda e: None)
-            button.unbind("<FocusOut>")
-            self.frame.focus_set()
-            return "break"
-
-        def on_mouse_click(event):
-            mouse_buttons = {1: "Button1", 3: "Button3"}
-            if event.num in mouse_buttons:
-                mods = []
-                if "Control_L" in pressed_modifiers or "Control_R" in pressed_modifiers:
-                    mods.append("Ctrl")
-                if "Alt_L" in pressed_modifiers or "Alt_R" in pressed_modifiers:
-                    mods.append("Alt")
-                if "Shift_L" in pressed_modifiers or "Shift_R" in pressed_modifiers:
-                    mods.append("Shift")
-                if "Meta_L" in pressed_modifiers or "Meta_R" in pressed_modifiers:
-                    mods.append("Meta")
-                combo = "+".join(mods + [mouse_buttons[event.num]])
-                var.set(combo)
-                button.config(text=combo)
-                button.bind("<Button-1>", lambda e: None)
-                button.bind("<Button-3>", lambda e: None)
-                button.unbind("<KeyPress>")
-                button.unbind("<KeyRelease>")
-                button.unbind("<FocusOut>")
-                self.frame.focus_set()
-                return "break"
-
-        def on_key_release(event):
-            pressed_modifiers.clear()
-
-        def on_focus_out(event):
-            if not var.get():
-                button.config(text=original)
-            button.bind("<Button-1>", lambda e: None)
-            button.bind("<Button-3>", lambda e: None)
-            button.unbind("<KeyPress>")
-            button.unbind("<KeyRelease>")
-            button.unbind("<FocusOut>")
-
-        button.bind("<KeyPress>", on_key_press)
-        button.bind("<KeyRelease>", on_key_release)
-        button.bind("<Button-1>", on_mouse_click)
-        button.bind("<Button-3>", on_mouse_click)
-        button.bind("<FocusOut>", on_focus_out)
-        button.focus_set()
-
-    def remove(self):
-        if self.on_remove:
-            self.on_remove(self)
-
-    def grid_remove(self):
-        self.frame.pack_forget()
-
-    def to_dict(self):
-        from_key = self.from_key.get().strip()
-        to_key = self.to_key.get().strip()
-        if not from_key or not to_key:
-            return {}
-        mouse_buttons = {"Button1": "BTN_LEFT", "Button3": "BTN_RIGHT"}
-        mods = {"Ctrl": "C", "Alt": "A", "Shift": "S", "Meta": "M"}
-        def format_key(key):
-            parts = key.split("+")
-            mapped = []
-            for part in parts:
-                part = part.strip()
-                mapped.append(mods.get(part, mouse_buttons.get(part, part.upper())))
-            return "-".join(mapped)
-        return {format_key(from_key): format_key(to_key)}
+
+from .bundle import BUNDLE_SUFFIX, Bundle, export_profiles, import_profiles
+from .compiler import compile_profiles, describe_conflict
+from .devices import DEV_INPUT_DIR, DeviceIndex, load_cached_devices, refresh_device_cache
+from .focus import FocusTracker
+from .fsutil import atomic_write
+from .keys import format_combo, parse_combo
+from .layers import DEFAULT_MODE, build_profile, split_layers, toggle_collisions, validate_profile
+from .macros import MacroRecorder
+from .paths import ACTIVE_CONFIG, DEVICE_CACHE_FILE, DEVICES_FILE, LAST_PROFILE_FILE, PROFILES_DIR, SESSIONS_DIR, ensure_dirs
+from .remap_list import RemapListView, RemapRows, capture_combo, pairs_to_remap, remap_to_pairs
+from .store import ProfileStore, dump_yaml
+from .sessions import MAIN_SESSION, MAIN_SESSION_LABEL, SessionError, SessionManager, format_uptime
+from .supervisor import xremap_command
+from .tasks import TaskRunner
+from .timing import TIMINGS, record, span, timed
+from .watch import DeviceWatcher
+from .windows import list_windows, list_wm_classes
+
+BASE_LAYER = ""
+BASE_LAYER_LABEL = "(base)"
 
 class XRemapGUI:
     def __init__(self, root):
+        started = time.perf_counter()
+        ensure_dirs()
         self.root = root
         self.root.configure(bg="#2e2e2e")
         self.root.title("xremap GUI")
-        self.remaps = []
+        self.remaps = RemapRows()
+        # Rows of the layer being edited live in self.remaps; the other layers keep theirs here until selected.
+        self.layers = {BASE_LAYER: {"toggle": "", "pairs": []}}
+        self.current_layer = BASE_LAYER
+        self.layers_modified = False
+        self.extra_keymaps = []
+        self.tasks = TaskRunner(lambda: self.post_event("<<TasksChanged>>"))
+        self.root.bind("<<TasksChanged>>", self.on_tasks_changed)
+        # The profiles and device links are read by the startup task below, not on the Tk thread.
+        self.store = ProfileStore(PROFILES_DIR, DEVICES_FILE, LAST_PROFILE_FILE, load=False)
         self.device_vars = []
-        self.devices = list_user_input_devices()
+        self.device_widgets = {}
+        self.device_changes = queue.Queue()
+        self.profile_devices = []
+        self.loaded_profile = ""
+        self.devices, devices_fresh = load_cached_devices(DEVICE_CACHE_FILE)
+        self.device_index = DeviceIndex(load=False)
         self.remap_active = False
-        self.xremap_proc = None
+        self.supervisor_states = queue.Queue()
+        self.sessions = SessionManager(self.on_supervisor_state, self.on_session_line)
+        # Start Remap drives the main session; profiles run on other device groups get sessions of their own.
+        self.supervisor = self.sessions.supervisor(MAIN_SESSION)
+        self.active_profile = None
+        self.active_profiles = []
+        self.active_devices = []
+        self.active_text = ""
+        self.applied_profile = None
+        # The profile whose text is in ACTIVE_CONFIG. Every write of that file takes config_lock, whichever
+        # thread it comes from; applied_profile follows it on the Tk thread.
+        self.config_lock = threading.Lock()
+        self.config_profile = None
+        self.merge_vars = {}
+        self.profile_texts = {}
+        self.focus_tracker = None
+        self.reload_started = None
+        self.reloaded_at = None
+        self.spawn_started = None
+        self.reload_latency = ""
+        self.status_job = None
 
         style = ttk.Style()
         style.theme_use("clam")
@@ -214,6 +82,8 @@ class XRemapGUI:
         style.configure("TCheckbutton", background="#2e2e2e", foreground="white")
         style.configure("TLabelframe", background="#2e2e2e", foreground="white")
         style.configure("TLabelframe.Label", background="#2e2e2e", foreground="white")
+        style.configure("Treeview", background="#3c3f41", fieldbackground="#3c3f41", foreground="white")
+        style.configure("Treeview.Heading", background="#2e2e2e", foreground="white")
 
         self.profile_frame = ttk.Labelframe(root, text="Profile")
         self.profile_frame.grid(row=0, column=0, padx=10, pady=5, sticky="ew")
@@ -222,23 +92,54 @@ class XRemapGUI:
         self.profile_combobox.grid(row=0, column=0, padx=5)
         self.profile_combobox.bind("<<ComboboxSelected>>", lambda e: self.load_profile())
         tk.Button(self.profile_frame, text="Save", fg="white", bg="#3c3f41", width=4, command=self.save_profile).grid(row=0, column=1, padx=2, pady=5)
-        tk.Button(self.profile_frame, text="+", fg="white", bg="blue",font=("Arial", 12, "bold"), width=1, command=self.clear_profile).grid(row=0, column=2, padx=2, pady=5)
+        tk.Button(self.profile_frame, text="+", fg="white", bg="blue",font=("Arial", 12, "bold"), width=1, command=self.new_profile).grid(row=0, column=2, padx=2, pady=5)
         tk.Button(self.profile_frame, text="✖", fg="white", bg="red", width=1, command=self.delete_profile).grid(row=0, column=3, padx=2, pady=5)
+        self.merge_button = tk.Menubutton(self.profile_frame, text="Merge ▾", fg="white", bg="#3c3f41", activebackground="#5c5f61",
+                                          relief="raised")
+        self.merge_menu = tk.Menu(self.merge_button, tearoff=False)
+        self.merge_button["menu"] = self.merge_menu
+        self.merge_button.grid(row=0, column=4, padx=2, pady=5)
+        self.bundle_button = tk.Menubutton(self.profile_frame, text="Bundle ▾", fg="white", bg="#3c3f41",
+                                           activebackground="#5c5f61", relief="raised")
+        self.bundle_menu = tk.Menu(self.bundle_button, tearoff=False)
+        self.bundle_menu.add_command(label="Import…", command=self.import_bundle)
+        self.bundle_menu.add_command(label="Export…", command=self.export_bundle)
+        self.bundle_button["menu"] = self.bundle_menu
+        self.bundle_button.grid(row=0, column=5, padx=2, pady=5)
 
         self.device_frame = ttk.Labelframe(root, text="Devices")
         self.device_frame.grid(row=1, column=0, padx=10, pady=5, sticky="ew")
-        for i, dev in enumerate(self.devices):
-            var = tk.BooleanVar()
-            ttk.Checkbutton(self.device_frame, text=dev.get("display_name", dev["name"]), variable=var).grid(row=i, column=0, sticky="w", padx=(5, 0))
-            self.device_vars.append((var, dev["event"]))
+        with span("startup.devices"):
+            self.populate_devices()
+        if not devices_fresh:
+            self.tasks.submit("Scanning devices", timed("devices.scan")(self.scan_devices), self.update_devices, key="devices")
+        self.root.bind("<<DevicesChanged>>", self.apply_device_changes)
+        self.device_watcher = DeviceWatcher(self.on_devices_changed)
+        self.device_watcher.start()
 
         self.keybind_frame = ttk.Labelframe(root, text="Remaps")
         self.keybind_frame.grid(row=2, column=0, padx=10, pady=5, sticky="nsew")
-        self.key_frame_container, self.key_frame = self.create_scrollable_frame(self.keybind_frame)
-        self.key_frame_container.pack(fill="both", expand=True)
+        self.remap_view = RemapListView(self.keybind_frame, self.remaps, self.set_remap_key, self.remove_remap)
+        self.remap_view.container.pack(fill="both", expand=True)
         self.button_frame = ttk.Frame(self.keybind_frame)
         self.button_frame.pack(fill="x", padx=10, pady=10, anchor="w")
-        tk.Button(self.button_frame, text="+", fg="white", bg="blue", font=("Arial", 12, "bold"), width=1, command=self.add_remap).pack(side="left")
+        tk.Button(self.button_frame, text="+", fg="white", bg="blue", font=("Arial", 12, "bold"), width=1, command=self.new_remap).pack(side="left")
+        self.record_button = tk.Button(self.button_frame, text="⏺ Record", fg="white", bg="#3c3f41", activebackground="#5c5f61",
+                                       command=self.toggle_recording)
+        self.record_button.pack(side="left", padx=5)
+        ttk.Label(self.button_frame, text="Layer").pack(side="left", padx=(15, 5))
+        self.layer_var = tk.StringVar(value=BASE_LAYER_LABEL)
+        self.layer_combobox = ttk.Combobox(self.button_frame, textvariable=self.layer_var, width=12, state="readonly",
+                                           values=[BASE_LAYER_LABEL])
+        self.layer_combobox.pack(side="left")
+        self.layer_combobox.bind("<<ComboboxSelected>>", lambda e: self.switch_layer(self.layer_name()))
+        tk.Button(self.button_frame, text="+", fg="white", bg="blue", font=("Arial", 12, "bold"), width=1,
+                  command=self.add_layer).pack(side="left", padx=2)
+        tk.Button(self.button_frame, text="✖", fg="white", bg="red", width=1, command=self.remove_layer).pack(side="left", padx=2)
+        self.layer_toggle_button = tk.Button(self.button_frame, text="Toggle: –", fg="white", bg="#3c3f41",
+                                             activebackground="#5c5f61", state="disabled", command=self.set_layer_toggle)
+        self.layer_toggle_button.pack(side="left", padx=5)
+        self.recorder = None
 
         self.scope_frame = ttk.Frame(root)
         self.scope_frame.grid(row=3, column=0, padx=10, pady=5, sticky="w")
@@ -248,139 +149,254 @@ class XRemapGUI:
         self.app_var = tk.StringVar()
         self.app_combobox = ttk.Combobox(self.scope_frame, textvariable=self.app_var, width=33, state="disabled")
         self.app_combobox.pack(side="left", padx=5)
+        self.auto_var = tk.BooleanVar()
+        ttk.Checkbutton(self.scope_frame, text="Auto Switch", variable=self.auto_var,
+                       command=self.toggle_auto_switch).pack(side="left")
         self.populate_wm_classes()
 
-        self.toggle_button = tk.Button(root, text="Start Remap", fg="white", bg="green", command=self.toggle_remap)
-        self.toggle_button.grid(row=4, column=0, pady=10)
+        self.remap_frame = ttk.Frame(root)
+        self.remap_frame.grid(row=4, column=0, pady=(10, 0))
+        self.toggle_button = tk.Button(self.remap_frame, text="Start Remap", fg="white", bg="green", command=self.toggle_remap)
+        self.toggle_button.pack(side="left")
+        tk.Button(self.remap_frame, text="Sessions…", fg="white", bg="#3c3f41", activebackground="#5c5f61",
+                  command=self.show_sessions).pack(side="left", padx=5)
+        self.sessions_window = None
+        self.status_var = tk.StringVar()
+        tk.Label(root, textvariable=self.status_var, fg="#a0a0a0", bg="#2e2e2e").grid(row=5, column=0, pady=(0, 5))
+        self.root.bind("<<ConfigReloaded>>", self.on_config_reloaded)
+        self.root.bind("<<SupervisorChanged>>", self.apply_supervisor_states)
+        self.root.bind("<<ProfileSwitched>>", self.on_profile_switched)
 
         self.load_profiles()
-        if (last_profile := load_last_profile()) and last_profile in self.profile_combobox["values"]:
-            self.profile_var.set(last_profile)
-            self.load_profile()
+        self.tasks.submit("Reading profiles", timed("startup.profiles")(self.read_startup_state), self.show_startup_state,
+                          key="startup")
 
         self.root.grid_rowconfigure(2, weight=1)
         self.root.grid_columnconfigure(0, weight=1)
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
+        self.timings_window = None
+        self.root.bind("<F12>", lambda e: self.show_timings())
+        record("startup.window", time.perf_counter() - started)
+        self.root.after_idle(lambda: record("startup.first_idle", time.perf_counter() - started))
 
-    def create_scrollable_frame(self, parent):
-        container = tk.Frame(parent, bg="#2e2e2e")
-        canvas = tk.Canvas(container, bg="#2e2e2e", highlightthickness=0)
-        scrollbar = tk.Scrollbar(container, orient="vertical", command=canvas.yview)
-        scrollable_frame = tk.Frame(canvas, bg="#2e2e2e")
-        scrollable_frame.bind("<Configure>", lambda e: canvas.configure(scrollregion=canvas.bbox("all")))
-        canvas.create_window((0, 0), window=scrollable_frame, anchor="nw")
-        canvas.configure(yscrollcommand=scrollbar.set)
-        def on_mouse_wheel(event):
-            if event.num == 4:
-                canvas.yview_scroll(-1, "units")
-            elif event.num == 5:
-                canvas.yview_scroll(1, "units")
-        canvas.bind_all("<Button-4>", on_mouse_wheel)
-        canvas.bind_all("<Button-5>", on_mouse_wheel)
-        canvas.pack(side="left", fill="both", expand=True)
-        scrollbar.pack(side="right", fill="y")
-        return container, scrollable_frame
+    def read_startup_state(self):
+        self.store.reload()
+        self.device_index.refresh()
+        return self.store.last_profile()
+
+    def show_startup_state(self, last_profile):
+        self.load_profiles()
+        if last_profile and last_profile in self.store:
+            self.profile_var.set(last_profile)
+            self.load_profile("startup.last_profile")
+        self.root.bind("<<ProfilesChanged>>", lambda e: self.load_profiles())
+        self.store.watch(lambda: self.post_event("<<ProfilesChanged>>"))
+
+    def populate_devices(self, selected=()):
+        for child in self.device_frame.winfo_children():
+            child.destroy()
+        self.device_vars = []
+        self.device_widgets = {}
+        self.device_rows = 0
+        for dev in self.devices:
+            self.add_device_widget(dev, dev["event"] in selected)
+
+    def add_device_widget(self, dev, selected=False):
+        var = tk.BooleanVar(value=selected)
+        button = ttk.Checkbutton(self.device_frame, text=dev.get("display_name", dev["name"]), variable=var)
+        button.grid(row=self.device_rows, column=0, sticky="w", padx=(5, 0))
+        self.device_rows += 1
+        self.device_vars.append((var, dev["event"]))
+        self.device_widgets[dev["event"]] = button
+
+    def remove_device_widget(self, event_name):
+        if (button := self.device_widgets.pop(event_name, None)) is not None:
+            button.destroy()
+            self.device_vars = [(var, dev) for var, dev in self.device_vars if dev != event_name]
+        self.devices = [dev for dev in self.devices if dev["event"] != event_name]
+
+    def on_devices_changed(self, added, removed):
+        # Runs on the watcher thread, so the by-id/by-path links are re-read before Tk sees the change.
+        self.device_index.refresh()
+        self.device_changes.put((added, removed))
+        self.root.event_generate("<<DevicesChanged>>", when="tail")
+
+    def apply_device_changes(self, event=None):
+        while True:
+            try:
+                added, removed = self.device_changes.get_nowait()
+            except queue.Empty:
+                return
+            profile_events = self.profile_device_events()
+            for event_name in removed:
+                self.remove_device_widget(event_name)
+            for dev in added:
+                # A node name can come back for a different device (a replug that reuses eventN), so the
+                # entry is rebuilt from the identity the watcher just read.
+                self.remove_device_widget(dev["event"])
+                if not dev["include"]:
+                    continue
+                count = sum(1 for d in self.devices if d["name"] == dev["name"])
+                dev["display_name"] = dev["name"] + (f" ({dev['event']})" if count == 0 else f" ({dev['event']}, #{count})")
+                self.devices.append(dev)
+                self.add_device_widget(dev, dev["event"] in profile_events)
+
+    def update_devices(self, devices):
+        if devices == self.devices:
+            return
+        known = {dev for _, dev in self.device_vars}
+        selected = {dev for var, dev in self.device_vars if var.get()}
+        selected.update(dev for dev in self.profile_device_events() if dev not in known)
+        self.devices = devices
+        self.populate_devices(selected)
+
+    def scan_devices(self):
+        devices = refresh_device_cache(DEVICE_CACHE_FILE)
+        self.device_index.refresh()
+        return devices
+
+    def profile_device_events(self):
+        # Runs on the Tk thread, so it only looks at the links the watcher thread or the scan task last read.
+        return set(self.device_index.lookup_all(self.profile_devices))
 
     def populate_wm_classes(self):
-        try:
-            output = subprocess.check_output(["wmctrl", "-l"]).decode()
-            classes = set()
-            for line in output.splitlines():
-                if line.strip():
-                    try:
-                        win_id = line.split()[0]
-                        xprop = subprocess.check_output(["xprop", "-id", win_id, "WM_CLASS"]).decode()
-                        match = re.search(r'WM_CLASS.*?= "([^"]+)", "([^"]+)"', xprop)
-                        if match:
-                            classes.add(f"{match.group(1)}.{match.group(2)}")
-                    except subprocess.SubprocessError:
-                        continue
-            self.app_combobox["values"] = sorted(classes)
-        except subprocess.SubprocessError:
-            self.app_combobox["values"] = []
+        self.app_combobox["values"] = []
+        self.tasks.submit("Scanning windows", timed("wm_classes.scan")(list_wm_classes),
+                          lambda classes: self.app_combobox.configure(values=sorted(classes)), key="wm_classes")
 
     def load_profiles(self):
-        profiles = {}
-        if os.path.exists(PROFILES_DIR):
-            for f in os.listdir(PROFILES_DIR):
-                if f.endswith(".yml"):
-                    profiles[f[:-4]] = {}
-        self.profile_combobox["values"] = sorted(profiles.keys()) or [""]
-        return profiles
-
-    def load_profile(self):
+        names = self.store.names()
+        self.profile_combobox["values"] = names or [""]
+        self.merge_vars = {name: self.merge_vars.get(name) or tk.BooleanVar() for name in names}
+        self.merge_menu.delete(0, "end")
+        for name in names:
+            self.merge_menu.add_checkbutton(label=name, variable=self.merge_vars[name])
+        return names
+
+    def confirm_discard(self):
+        if not self.layers_modified and not self.remaps.modified():
+            return True
+        name = f" to '{self.loaded_profile}'" if self.loaded_profile else ""
+        return messagebox.askyesno("Unsaved Changes", f"Discard unsaved changes{name}?")
+
+    def load_profile(self, span_name="profile.switch"):
         name = self.profile_var.get().strip()
         if not name:
             return
+        if name != self.loaded_profile and not self.confirm_discard():
+            self.profile_var.set(self.loaded_profile)
+            return
+        started = time.perf_counter()
+        # Selecting another profile before this one is read cancels it, so only the last selection is shown.
+        self.tasks.submit(f"Loading '{name}'", lambda: self.read_profile(name),
+                          lambda result: self.show_profile(name, result, span_name, started), key="profile")
+
+    def read_profile(self, name):
         try:
-            with open(f"{PROFILES_DIR}/{name}.yml", "r") as f:
-                profile = yaml.safe_load(f)
-            for r in self.remaps[:]:
-                self.remove_remap(r)
-            keymap = profile.get("keymap", [{}])[0]
-            for from_key, to_key in keymap.get("remap", {}).items():
-                if isinstance(to_key, list):
-                    for tk in to_key:
-                        self.add_remap(from_key, tk)
-                else:
-                    self.add_remap(from_key, to_key)
-            devices = []
-            try:
-                if os.path.exists(DEVICES_FILE):
-                    with open(DEVICES_FILE, "r") as f:
-                        devices = json.load(f).get(name, [])
-            except (IOError, json.JSONDecodeError):
-                pass
-            for var, dev in self.device_vars:
-                var.set(dev in devices)
-            app = keymap.get("application", {}).get("only", "")
-            self.scope_var.set(bool(app))
-            self.app_var.set(app)
-            self.update_dropdown_state()
-            with open(LAST_PROFILE_FILE, "w") as f:
-                f.write(name)
+            profile = self.store.read(name)
         except (IOError, yaml.YAMLError):
-            pass
+            return None
+        base, base_remap, layers, extra = split_layers(profile)
+        layers = [(layer, parse_combo(toggle) if toggle else "", remap_to_pairs(remap)) for layer, toggle, remap in layers]
+        devices = self.store.devices(name)
+        events = set(self.device_index.resolve_all(devices))
+        return remap_to_pairs(base_remap), layers, extra, devices, events, (base.get("application") or {}).get("only", "")
+
+    def show_profile(self, name, result, span_name, started):
+        if result is None:
+            return
+        pairs, layers, extra, devices, events, app = result
+        self.layers = {BASE_LAYER: {"toggle": "", "pairs": pairs}}
+        for layer, toggle, layer_pairs in layers:
+            self.layers[layer] = {"toggle": toggle, "pairs": layer_pairs}
+        self.extra_keymaps = extra
+        self.layers_modified = False
+        self.show_layer(BASE_LAYER)
+        self.loaded_profile = name
+        self.profile_devices = devices
+        for var, dev in self.device_vars:
+            var.set(dev in events)
+        self.scope_var.set(bool(app))
+        self.app_var.set(app)
+        self.update_dropdown_state()
+        record(span_name, time.perf_counter() - started)
+        self.tasks.submit(None, lambda: self.store.set_last_profile(name), key="last_profile")
 
     def save_profile(self):
         name = self.profile_var.get().strip()
         if not name:
             messagebox.showerror("Error", "Profile name cannot be empty.")
             return
-        profile = {"keymap": [{"name": name}]}
-        keymap = profile["keymap"][0]
-        if self.scope_var.get() and self.app_var.get().strip():
-            keymap["application"] = {"only": self.app_var.get().strip()}
-        remap_dict = {}
-        for r in self.remaps:
-            remap = r.to_dict()
-            if remap:
-                from_key, to_key = next(iter(remap.items()))
-                if from_key in remap_dict:
-                    if isinstance(remap_dict[from_key], str):
-                        remap_dict[from_key] = [remap_dict[from_key]]
-                    remap_dict[from_key].append(to_key)
-                else:
-                    remap_dict[from_key] = to_key
-        keymap["remap"] = remap_dict
-        devices = [dev for var, dev in self.device_vars if var.get()]
-        try:
-            with open(f"{PROFILES_DIR}/{name}.yml", "w") as f:
-                yaml.safe_dump(profile, f, default_flow_style=False)
-            devices_data = {}
-            if os.path.exists(DEVICES_FILE):
-                with open(DEVICES_FILE, "r") as f:
-                    devices_data = json.load(f)
-            devices_data[name] = devices
-            os.makedirs(os.path.dirname(DEVICES_FILE), exist_ok=True)
-            with open(DEVICES_FILE, "w") as f:
-                json.dump(devices_data, f, indent=2)
-            self.profile_combobox["values"] = sorted(self.load_profiles().keys())
-            with open(LAST_PROFILE_FILE, "w") as f:
-                f.write(name)
-            messagebox.showinfo("Saved", f"Profile '{name}' saved.")
-        except (IOError, json.JSONDecodeError) as e:
-            messagebox.showerror("Error", f"Failed to save profile: {e}")
+        started = time.perf_counter()
+        self.stash_layer()
+        app = self.app_var.get().strip() if self.scope_var.get() else ""
+        layers = [(layer, format_combo(data["toggle"]) if data["toggle"] else None, pairs_to_remap(data["pairs"]))
+                  for layer, data in self.layers.items() if layer != BASE_LAYER]
+        base_remap = pairs_to_remap(self.layers[BASE_LAYER]["pairs"])
+        profile = build_profile(name, app, base_remap, layers, self.extra_keymaps)
+        with span("profile.validate"):
+            issues = toggle_collisions(base_remap, layers) + validate_profile(profile)
+        devices = [self.device_index.identity(dev) for var, dev in self.device_vars if var.get()]
+        hot_apply = self.remap_active and (name in self.active_profiles or name == self.applied_profile)
+        in_session = name in self.sessions and self.sessions[name].active
+        pairs = list(self.remaps.items())
+        active_profiles = list(self.active_profiles)
+        active_devices = list(self.active_devices)
+        # Saves of one profile run one at a time, and a newer save supersedes one still waiting.
+        self.tasks.submit(f"Saving '{name}'",
+                          lambda: self.write_profile(name, profile, devices, hot_apply, active_profiles, in_session,
+                                                     active_devices),
+                          lambda result: self.profile_saved(name, pairs, hot_apply or in_session, issues, started, *result),
+                          lambda e: messagebox.showerror("Error", f"Failed to save profile: {e}"), key=f"save:{name}")
+
+    def write_profile(self, name, profile, devices, hot_apply, active_profiles, in_session, active_devices):
+        # Runs on a worker thread and only touches files; the GUI state is updated from the result by
+        # profile_saved. Returns (restart, profile text, active config text, time the active config was written).
+        self.store.save(name, profile, devices)
+        self.store.set_last_profile(name)
+        text = self.read_profile_text(name)
+        if in_session:
+            # Sessions keep the devices they were started on, so their config is simply replaced.
+            atomic_write(self.session_config(name), text)
+        if hot_apply and name in active_profiles:
+            active_text, new_devices, _ = self.build_active_config(active_profiles)
+            if self.resolve_devices(new_devices) != active_devices:
+                return True, text, None, None
+            # Written only while the started profiles are applied, not an application profile switched in.
+            written = self.write_active_config(active_profiles[0], active_text, expect=active_profiles[0])
+            return False, text, active_text, written
+        if hot_apply:
+            return False, text, None, self.write_active_config(name, text, expect=name)
+        return False, text, None, None
+
+    def profile_saved(self, name, pairs, hot_apply, issues, started, restart, text, active_text, written):
+        if name in self.profile_texts or hot_apply:
+            self.profile_texts[name] = text
+        if active_text is not None:
+            self.active_text = active_text
+        if written is not None:
+            # xremap can report the reload before this callback runs.
+            if self.reloaded_at is not None and self.reloaded_at >= written:
+                self.record_reload(self.reloaded_at - written)
+            else:
+                self.reload_started = written
+        self.remaps.mark_saved(pairs)
+        self.layers_modified = False
+        self.loaded_profile = name
+        self.load_profiles()
+        if restart:
+            self.start_remap(restart=True)
+        if self.focus_tracker is not None:
+            self.tasks.submit("Reading profiles", self.collect_app_profiles, self.update_app_profiles, key="app_profiles")
+        record("profile.save", time.perf_counter() - started)
+        message = f"Profile '{name}' saved and applied." if hot_apply else f"Profile '{name}' saved."
+        if issues:
+            lines = [issue.message for issue in issues[:10]]
+            if len(issues) > 10:
+                lines.append(f"… and {len(issues) - 10} more")
+            messagebox.showwarning("Saved", message + "\n\n" + "\n".join(lines))
+        else:
+            messagebox.showinfo("Saved", message)
 
     def delete_profile(self):
         name = self.profile_var.get().strip()
@@ -389,117 +405,580 @@ class XRemapGUI:
             return
         if not messagebox.askyesno("Delete Profile", f"Delete profile '{name}'?"):
             return
-        try:
-            os.remove(f"{PROFILES_DIR}/{name}.yml")
-            devices_data = {}
-            if os.path.exists(DEVICES_FILE):
-                with open(DEVICES_FILE, "r") as f:
-                    devices_data = json.load(f)
-                if name in devices_data:
-                    del devices_data[name]
-                    with open(DEVICES_FILE, "w") as f:
-                        json.dump(devices_data, f, indent=2)
-            self.profile_combobox["values"] = sorted(self.load_profiles().keys()) or [""]
-            self.profile_var.set("")
-            self.clear_profile()
+        def deleted(result):
+            self.load_profiles()
+            if self.profile_var.get().strip() == name:
+                self.profile_var.set("")
+                self.clear_profile()
             messagebox.showinfo("Deleted", f"Profile '{name}' deleted.")
-        except (IOError, json.JSONDecodeError) as e:
-            messagebox.showerror("Error", f"Failed to delete profile: {e}")
+        self.tasks.submit(f"Deleting '{name}'", lambda: self.store.delete(name), deleted,
+                          lambda e: messagebox.showerror("Error", f"Failed to delete profile: {e}"))
+
+    def export_bundle(self):
+        path = filedialog.asksaveasfilename(parent=self.root, title="Export Profiles", defaultextension=BUNDLE_SUFFIX,
+                                            filetypes=[("Profile bundles", f"*{BUNDLE_SUFFIX}")])
+        if not path:
+            return
+        self.tasks.submit("Exporting profiles", lambda: export_profiles(self.store, path),
+                          lambda count: messagebox.showinfo("Exported", f"Exported {count} profiles to {path}."),
+                          lambda e: messagebox.showerror("Error", f"Failed to export profiles: {e}"))
+
+    def import_bundle(self):
+        path = filedialog.askopenfilename(parent=self.root, title="Import Profiles",
+                                          filetypes=[("Profile bundles", f"*{BUNDLE_SUFFIX}"), ("All files", "*")])
+        if not path:
+            return
+        def read_index():
+            # Only the table of contents is read here; profiles are decompressed when imported.
+            with Bundle(path) as bundle:
+                return bundle.names()
+        self.tasks.submit("Reading bundle", read_index, lambda names: self.choose_bundle_profiles(path, names),
+                          lambda e: messagebox.showerror("Error", f"Failed to read bundle: {e}"))
+
+    def choose_bundle_profiles(self, path, names):
+        window = tk.Toplevel(self.root, bg="#2e2e2e")
+        window.title("Import Profiles")
+        window.transient(self.root)
+        listbox = tk.Listbox(window, selectmode="extended", width=40, height=min(max(len(names), 5), 20), fg="white",
+                             bg="#3c3f41", selectbackground="#5c5f61", relief="flat")
+        for name in names:
+            listbox.insert("end", f"{name} (exists)" if name in self.store else name)
+        listbox.selection_set(0, "end")
+        listbox.pack(fill="both", expand=True, padx=10, pady=(10, 5))
+        overwrite_var = tk.BooleanVar()
+        ttk.Checkbutton(window, text="Replace existing profiles", variable=overwrite_var).pack(anchor="w", padx=10)
+        def imported(result):
+            added, skipped = result
+            self.load_profiles()
+            message = f"Imported {len(added)} profiles."
+            if skipped:
+                message += f"\nSkipped existing: {', '.join(skipped[:10])}{' …' if len(skipped) > 10 else ''}"
+            messagebox.showinfo("Imported", message)
+        def run_import(selected, overwrite):
+            # Runs on a worker thread; the store re-reads every device file, so the rescan happens here too.
+            result = import_profiles(self.store, path, selected, overwrite)
+            self.store.reload()
+            return result
+        def start_import():
+            selected = [names[i] for i in listbox.curselection()]
+            overwrite = overwrite_var.get()
+            window.destroy()
+            if selected:
+                self.tasks.submit("Importing profiles", lambda: run_import(selected, overwrite), imported,
+                                  lambda e: messagebox.showerror("Error", f"Failed to import profiles: {e}"))
+        tk.Button(window, text="Import", fg="white", bg="#3c3f41", command=start_import).pack(pady=10)
+
+    def new_profile(self):
+        if self.confirm_discard():
+            self.clear_profile()
 
     def clear_profile(self):
         for var, _ in self.device_vars:
             var.set(False)
-        for r in self.remaps[:]:
-            self.remove_remap(r)
+        self.remaps.clear()
+        self.remaps.mark_saved()
+        self.layers = {BASE_LAYER: {"toggle": "", "pairs": []}}
+        self.current_layer = BASE_LAYER
+        self.layers_modified = False
+        self.extra_keymaps = []
+        self.show_layers()
+        self.loaded_profile = ""
+        self.remap_view.update()
         self.profile_var.set("")
         self.app_var.set("")
         self.scope_var.set(False)
         self.update_dropdown_state()
 
-    def add_remap(self, from_key="", to_key=""):
-        remap = KeyRemap(self.key_frame, len(self.remaps), from_key, to_key, self.remove_remap)
-        self.remaps.append(remap)
+    def layer_name(self):
+        label = self.layer_var.get()
+        return BASE_LAYER if label == BASE_LAYER_LABEL else label
+
+    def stash_layer(self):
+        if self.remaps.modified():
+            self.layers_modified = True
+        self.layers[self.current_layer]["pairs"] = list(self.remaps.items())
+
+    def show_layer(self, layer):
+        # Rows shared with the previous layer or profile stay where they are; only differences are touched.
+        self.current_layer = layer
+        if self.remaps.sync(self.layers[layer]["pairs"]):
+            self.remap_view.update()
+        self.remaps.mark_saved()
+        self.show_layers()
+
+    def show_layers(self):
+        self.layer_combobox["values"] = [BASE_LAYER_LABEL] + [layer for layer in self.layers if layer != BASE_LAYER]
+        self.layer_var.set(self.current_layer or BASE_LAYER_LABEL)
+        toggle = self.layers[self.current_layer]["toggle"]
+        self.layer_toggle_button.config(text=f"Toggle: {toggle or '–'}",
+                                        state="disabled" if self.current_layer == BASE_LAYER else "normal")
+
+    def switch_layer(self, layer):
+        if layer != self.current_layer:
+            self.stash_layer()
+            self.show_layer(layer)
+
+    def add_layer(self):
+        name = (simpledialog.askstring("New Layer", "Layer name:", parent=self.root) or "").strip()
+        if not name:
+            return
+        if name in self.layers or name in (DEFAULT_MODE, BASE_LAYER_LABEL):
+            messagebox.showerror("Error", f"Layer name '{name}' is already in use.")
+            return
+        self.stash_layer()
+        self.layers[name] = {"toggle": "", "pairs": []}
+        self.layers_modified = True
+        self.show_layer(name)
+
+    def remove_layer(self):
+        layer = self.current_layer
+        if layer == BASE_LAYER:
+            return
+        if not messagebox.askyesno("Remove Layer", f"Remove layer '{layer}' and its remaps?"):
+            return
+        del self.layers[layer]
+        self.layers_modified = True
+        self.show_layer(BASE_LAYER)
+
+    def set_layer_toggle(self):
+        layer = self.current_layer
+        self.layer_toggle_button.config(text="Toggle: ...")
+        def finish(combo):
+            if layer in self.layers:
+                self.layers[layer]["toggle"] = combo
+                self.layers_modified = True
+            self.show_layers()
+            self.root.focus_set()
+        capture_combo(self.layer_toggle_button, finish, self.show_layers)
 
-    def remove_remap(self, remap):
-        remap.grid_remove()
-        self.remaps.remove(remap)
+    def add_remap(self, from_key="", to_key=""):
+        self.remaps.append(from_key, to_key)
+        self.remap_view.update()
+
+    def new_remap(self):
+        self.remaps.append()
+        self.remap_view.see_end()
+
+    def set_remap_key(self, index, side, combo):
+        if 0 <= index < len(self.remaps):
+            self.remaps.set(index, side, combo)
+
+    def remove_remap(self, index):
+        self.remaps.pop(index)
+        self.remap_view.update()
+
+    def toggle_recording(self):
+        if self.recorder is not None:
+            recorder, self.recorder = self.recorder, None
+            self.record_button.config(text="⏺ Record")
+            macro = recorder.stop()
+            if recorder.dropped:
+                messagebox.showwarning("Macro", "The device dropped events while recording; the macro may be incomplete.")
+            if len(macro):
+                self.remaps.append("", macro)
+                self.remap_view.see_end()
+            return
+        selected = [dev for var, dev in self.device_vars if var.get()]
+        if not selected:
+            messagebox.showerror("Error", "Select the device to record from.")
+            return
+        path = f"{DEV_INPUT_DIR}/{selected[0]}"
+        if self.sessions.owner(path) is not None:
+            messagebox.showerror("Error", "xremap has grabbed this device. Stop remapping to record from it.")
+            return
+        recorder = MacroRecorder(path)
+        if not recorder.start():
+            messagebox.showerror("Error", f"Cannot read {path}: {recorder.error}. Ensure you are in the 'input' group.")
+            return
+        self.recorder = recorder
+        self.record_button.config(text="■ Stop")
 
     def update_dropdown_state(self):
         self.app_combobox.configure(state="readonly" if self.scope_var.get() else "disabled")
 
-    def start_remap(self):
-        if self.remap_active:
+    def start_remap(self, restart=False):
+        if self.remap_active and not restart:
             return
-        self.toggle_button.config(text="...")
-        self.root.update()
         name = self.profile_var.get().strip()
         if not name:
-            self.toggle_button.config(text="Start Remap")
             messagebox.showerror("Error", "No profile selected.")
             return
-        profiles = self.load_profiles()
-        if name not in profiles:
-            self.toggle_button.config(text="Start Remap")
+        if name not in self.store:
             messagebox.showerror("Error", f"Profile '{name}' not found.")
             return
-        devices = []
-        try:
-            if os.path.exists(DEVICES_FILE):
-                with open(DEVICES_FILE, "r") as f:
-                    devices = json.load(f).get(name, [])
-        except (IOError, json.JSONDecodeError):
-            pass
+        names = [name] + [n for n, var in self.merge_vars.items() if var.get() and n != name and n in self.store]
+        self.toggle_button.config(text="...")
+        self.tasks.submit("Preparing xremap", lambda: self.prepare_remap(names),
+                          lambda result: self.launch_remap(names, restart, *result),
+                          lambda e: self.remap_failed(f"Failed to read profile: {e}"), key="remap")
+
+    def prepare_remap(self, names):
+        # Runs on a worker thread. xremap is not watching the active config yet unless it is being
+        # restarted with the same one, so the file can be written before the user confirms conflicts.
+        text, devices, conflicts = self.build_active_config(names)
+        valid_devices = self.resolve_devices(devices)
+        if valid_devices:
+            self.write_active_config(names[0], text)
+        return text, devices, valid_devices, conflicts
+
+    def launch_remap(self, names, restart, text, devices, valid_devices, conflicts):
+        if conflicts and not restart:
+            shown = "\n".join(describe_conflict(c) for c in conflicts[:10])
+            more = f"\n… and {len(conflicts) - 10} more" if len(conflicts) > 10 else ""
+            if not messagebox.askyesno("Conflicting Bindings", f"{shown}{more}\n\nThe first binding wins. Start anyway?"):
+                self.remap_failed()
+                return
         if not devices:
-            self.toggle_button.config(text="Start Remap")
-            messagebox.showerror("Error", "No devices selected.")
+            self.remap_failed("No devices selected.")
             return
-        valid_devices = [f"/dev/input/{dev}" for dev in devices if os.path.exists(f"/dev/input/{dev}") and os.access(f"/dev/input/{dev}", os.R_OK | os.W_OK)]
         if not valid_devices:
-            self.toggle_button.config(text="Start Remap")
-            messagebox.showerror("Error", "No valid devices found. Ensure you are in the 'input' group.")
+            self.remap_failed("No valid devices found. Ensure you are in the 'input' group.")
+            return
+        if conflicts := self.sessions.conflicts(MAIN_SESSION, valid_devices):
+            device, owner, _ = conflicts[0]
+            self.remap_failed(f"{device} is used by session '{owner}'. Stop that session first.")
             return
+        self.remap_active = True
+        self.active_profile = names[0]
+        self.active_profiles = names
+        self.active_text = text
+        if len(names) == 1:
+            self.profile_texts[names[0]] = text
+        self.applied_profile = names[0]
+        self.active_devices = valid_devices
+        if self.focus_tracker is not None:
+            self.focus_tracker.current = None
+        self.spawn_started = time.perf_counter()
+        with span("xremap.spawn"):
+            self.sessions.start(MAIN_SESSION, xremap_command(ACTIVE_CONFIG, valid_devices), valid_devices)
+
+    def remap_failed(self, message=None):
+        self.toggle_button.config(text="Stop Remap" if self.remap_active else "Start Remap")
+        if message:
+            messagebox.showerror("Error", message)
+
+    def build_active_config(self, names):
+        # Runs on a worker thread.
+        if len(names) == 1:
+            return self.read_profile_text(names[0]), self.store.devices(names[0]), []
+        config, devices, conflicts = compile_profiles([(n, self.store.read(n), self.store.devices(n)) for n in names],
+                                                      self.resolve_devices)
+        return dump_yaml(config), devices, conflicts
+
+    def read_profile_text(self, name):
+        return self.store.read_text(name)
+
+    def collect_app_profiles(self):
+        app_profiles = {}
+        texts = {}
+        for name in self.store.names():
+            try:
+                profile = self.store.read(name)
+                base = split_layers(profile)[0]
+                app = (base.get("application") or {}).get("only", "")
+                if app:
+                    app_profiles[app] = name
+                    texts[name] = self.read_profile_text(name)
+            except (IOError, yaml.YAMLError, AttributeError):
+                continue
+        return app_profiles, texts
+
+    def toggle_auto_switch(self):
+        if self.auto_var.get():
+            self.tasks.submit("Reading profiles", lambda: (self.collect_app_profiles(), list_windows()),
+                              self.start_focus_tracker, key="app_profiles")
+            return
+        if self.focus_tracker is not None:
+            self.focus_tracker.stop()
+            self.focus_tracker = None
+        if self.remap_active and self.applied_profile != self.active_profile:
+            self.tasks.submit("Switching profile", lambda: self.on_focus_switch(None, None))
+
+    def start_focus_tracker(self, result):
+        (app_profiles, texts), windows = result
+        if not self.auto_var.get() or self.focus_tracker is not None:
+            return
+        self.profile_texts.update(texts)
+        self.focus_tracker = FocusTracker(self.on_focus_switch, app_profiles, windows)
+        if not self.focus_tracker.start():
+            self.focus_tracker = None
+            self.auto_var.set(False)
+            messagebox.showerror("Error", "Failed to track the active window. Is xprop installed?")
+
+    def update_app_profiles(self, result):
+        app_profiles, texts = result
+        self.profile_texts.update(texts)
+        if self.focus_tracker is not None:
+            self.focus_tracker.set_profiles(app_profiles)
+
+    def write_active_config(self, profile, text, expect=None):
+        # Returns when the file was written, or None if expect is given and another profile is in it.
+        with self.config_lock:
+            if expect is not None and self.config_profile != expect:
+                return None
+            written = time.monotonic()
+            atomic_write(ACTIVE_CONFIG, text)
+            self.config_profile = profile
+            return written
+
+    @timed("focus.switch")
+    def on_focus_switch(self, profile, wm_class):
+        # Runs on the tracker thread so a focus change reaches xremap without waiting for the Tk loop.
+        if not self.remap_active:
+            return
+        target = profile or self.active_profile
+        text = self.profile_texts.get(profile) if profile else self.active_text
+        if not text:
+            return
+        with self.config_lock:
+            if target == self.config_profile:
+                return
+            try:
+                atomic_write(ACTIVE_CONFIG, text)
+            except OSError:
+                return
+            self.config_profile = target
+        self.post_event("<<ProfileSwitched>>")
+
+    def on_profile_switched(self, event=None):
+        if self.remap_active:
+            with self.config_lock:
+                self.applied_profile = self.config_profile
+        self.update_status()
+
+    def resolve_devices(self, devices):
+        return self.device_index.device_paths(devices)
+
+    def on_xremap_line(self, line):
+        # xremap prints the devices it grabbed once it is up, so its first line marks it as ready.
+        spawn_started = self.spawn_started
+        if spawn_started is not None:
+            self.spawn_started = None
+            record("xremap.ready", time.perf_counter() - spawn_started)
+        if "reloading config" in line.lower():
+            self.post_event("<<ConfigReloaded>>")
+
+    def on_session_line(self, name, line):
+        if name == MAIN_SESSION:
+            self.on_xremap_line(line)
+
+    def on_supervisor_state(self, name, state):
+        self.supervisor_states.put((name, state))
+        self.post_event("<<SupervisorChanged>>")
+
+    def post_event(self, sequence):
         try:
-            cmd = ["xremap", f"{PROFILES_DIR}/{name}.yml"] + [arg for dev in valid_devices for arg in ["--device", dev]]
-            self.xremap_proc = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True)
-            self.remap_active = True
-            self.toggle_button.config(text="Stop Remap")
-        except subprocess.SubprocessError as e:
-            self.toggle_button.config(text="Start Remap")
-            messagebox.showerror("Error", f"Failed to start xremap: {e}")
+            self.root.event_generate(sequence, when="tail")
+        except (tk.TclError, RuntimeError):
+            pass
+
+    def apply_supervisor_states(self, event=None):
+        while True:
+            try:
+                name, state = self.supervisor_states.get_nowait()
+            except queue.Empty:
+                break
+            if name != MAIN_SESSION:
+                if state == "failed" and name in self.sessions:
+                    messagebox.showerror("Error", f"Failed to start xremap for '{name}': {self.sessions[name].supervisor.last_error}")
+            elif state == "started":
+                self.toggle_button.config(text="Stop Remap")
+            elif state == "failed":
+                messagebox.showerror("Error", f"Failed to start xremap: {self.supervisor.last_error}")
+            elif state == "stopped":
+                self.remap_active = False
+                self.active_profile = None
+                self.active_profiles = []
+                self.applied_profile = None
+                self.toggle_button.config(text="Start Remap")
+        self.update_status()
+
+    def update_status(self):
+        if self.status_job is not None:
+            self.root.after_cancel(self.status_job)
+            self.status_job = None
+        supervisor = self.supervisor
+        if supervisor.running:
+            uptime = int(supervisor.uptime)
+            status = f"Running {uptime // 3600}:{uptime // 60 % 60:02d}:{uptime % 60:02d}"
+            if supervisor.restarts:
+                status += f" · {supervisor.restarts} restart{'s' if supervisor.restarts != 1 else ''}"
+        elif self.remap_active:
+            status = f"xremap exited ({supervisor.last_exit}), restarting"
+        else:
+            status = ""
+        if supervisor.last_error:
+            status += f" · {supervisor.last_error}" if status else supervisor.last_error
+        if len(self.active_profiles) > 1:
+            status += f" · {' + '.join(self.active_profiles)}"
+        if self.remap_active and self.applied_profile != self.active_profile:
+            switch = f"{self.applied_profile} ({self.focus_tracker.last_latency * 1000:.1f} ms)" if self.focus_tracker else self.applied_profile
+            status += f" · using {switch}" if status else f"Using {switch}"
+        if self.reload_latency:
+            status += f" · applied in {self.reload_latency}" if status else f"Applied in {self.reload_latency}"
+        if sessions := [name for name in self.sessions.names() if name != MAIN_SESSION and self.sessions[name].active]:
+            status += f" · {len(sessions)} session{'s' if len(sessions) != 1 else ''}" if status else \
+                f"{len(sessions)} session{'s' if len(sessions) != 1 else ''} running"
+        if labels := self.tasks.labels():
+            status += f" · {', '.join(labels)}…" if status else f"{', '.join(labels)}…"
+        self.status_var.set(status)
+        if self.remap_active or sessions:
+            self.status_job = self.root.after(1000, self.update_status)
+
+    def on_config_reloaded(self, event=None):
+        self.reloaded_at = time.monotonic()
+        if self.reload_started is not None:
+            self.record_reload(self.reloaded_at - self.reload_started)
+
+    def record_reload(self, latency):
+        record("xremap.reload", latency)
+        self.reload_latency = f"{latency * 1000:.0f} ms"
+        self.reload_started = None
+        self.update_status()
+
+    def show_timings(self):
+        if self.timings_window is not None and self.timings_window.winfo_exists():
+            self.timings_window.lift()
+            return
+        window = self.timings_window = tk.Toplevel(self.root, bg="#2e2e2e")
+        window.title("Timings")
+        text = tk.Text(window, width=64, height=16, fg="white", bg="#3c3f41", font=("Monospace", 9), relief="flat")
+        text.pack(fill="both", expand=True, padx=10, pady=(10, 5))
+        buttons = ttk.Frame(window)
+        buttons.pack(fill="x", padx=10, pady=(0, 10))
+        def copy_json():
+            self.root.clipboard_clear()
+            self.root.clipboard_append(TIMINGS.to_json())
+        tk.Button(buttons, text="Copy JSON", fg="white", bg="#3c3f41", command=copy_json).pack(side="left")
+        tk.Button(buttons, text="Reset", fg="white", bg="#3c3f41", command=TIMINGS.clear).pack(side="left", padx=5)
+        def refresh():
+            if not window.winfo_exists():
+                return
+            text.configure(state="normal")
+            text.delete("1.0", "end")
+            text.insert("1.0", TIMINGS.format_table())
+            text.configure(state="disabled")
+            window.after(1000, refresh)
+        refresh()
+
+    def session_config(self, name):
+        return f"{SESSIONS_DIR}/{name}.yml"
+
+    def start_session(self):
+        name = self.profile_var.get().strip()
+        if not name or name not in self.store:
+            messagebox.showerror("Error", "Save the profile before running it as a session.")
+            return
+        if self.remap_active and name in self.active_profiles:
+            messagebox.showerror("Error", f"'{name}' is already running with Start Remap.")
+            return
+        selected = [dev for var, dev in self.device_vars if var.get()]
+        def prepare():
+            devices = self.resolve_devices(selected)
+            if not devices:
+                return None, devices
+            config = self.session_config(name)
+            atomic_write(config, self.read_profile_text(name))
+            return config, devices
+        def launch(result):
+            config, devices = result
+            if not devices:
+                messagebox.showerror("Error", "Select the devices for this session. Ensure you are in the 'input' group.")
+                return
+            try:
+                self.sessions.start(name, xremap_command(config, devices), devices)
+            except SessionError as e:
+                messagebox.showerror("Error", f"{e}. Stop that session or select other devices.")
+                return
+            self.update_status()
+        self.tasks.submit(f"Starting '{name}'", prepare, launch,
+                          lambda e: messagebox.showerror("Error", f"Failed to read profile: {e}"), key=f"session:{name}")
+
+    def stop_sessions(self, names):
+        for name in names:
+            if name == MAIN_SESSION:
+                self.stop_remap()
+            else:
+                self.tasks.cancel(f"session:{name}")
+                self.sessions.remove(name)
+        self.update_status()
+
+    def show_sessions(self):
+        if self.sessions_window is not None and self.sessions_window.winfo_exists():
+            self.sessions_window.lift()
+            return
+        window = self.sessions_window = tk.Toplevel(self.root, bg="#2e2e2e")
+        window.title("Sessions")
+        columns = ("state", "pid", "uptime", "restarts", "devices")
+        tree = ttk.Treeview(window, columns=columns, height=8)
+        tree.heading("#0", text="session")
+        tree.column("#0", width=140)
+        for column, width in zip(columns, (80, 70, 70, 70, 260)):
+            tree.heading(column, text=column)
+            tree.column(column, width=width, stretch=column == "devices")
+        tree.pack(fill="both", expand=True, padx=10, pady=(10, 5))
+        buttons = ttk.Frame(window)
+        buttons.pack(fill="x", padx=10, pady=(0, 10))
+        tk.Button(buttons, text="Run Profile on Selected Devices", fg="white", bg="#3c3f41",
+                  command=self.start_session).pack(side="left")
+        tk.Button(buttons, text="Stop", fg="white", bg="#3c3f41",
+                  command=lambda: self.stop_sessions([iid[len("session:"):] for iid in tree.selection()])).pack(side="left", padx=5)
+        tk.Button(buttons, text="Stop All", fg="white", bg="red",
+                  command=lambda: self.stop_sessions(self.sessions.names())).pack(side="left")
+        def refresh():
+            if not window.winfo_exists():
+                return
+            rows = {f"session:{row.name}": row for row in self.sessions.status()}
+            for iid in tree.get_children():
+                if iid not in rows:
+                    tree.delete(iid)
+            for iid, row in rows.items():
+                values = (row.state, row.pid or "-", format_uptime(row.uptime) if row.pid else "-", row.restarts,
+                          row.last_error if row.state == "restarting" else ", ".join(row.devices))
+                if tree.exists(iid):
+                    tree.item(iid, values=values)
+                else:
+                    tree.insert("", "end", iid=iid, text=row.name or MAIN_SESSION_LABEL, values=values)
+            window.after(1000, refresh)
+        refresh()
+
+    def on_tasks_changed(self, event=None):
+        self.tasks.dispatch()
+        self.update_status()
 
     def stop_remap(self):
-        if self.remap_active and self.xremap_proc:
+        self.tasks.cancel("remap")
+        if self.remap_active:
             self.toggle_button.config(text="...")
-            self.root.update()
-            self.xremap_proc.terminate()
-            try:
-                self.xremap_proc.wait(timeout=3)
-            except subprocess.TimeoutExpired:
-                self.xremap_proc.kill()
-            self.xremap_proc = None
-            self.remap_active = False
+            self.supervisor.stop()
+        else:
             self.toggle_button.config(text="Start Remap")
 
     def toggle_remap(self):
-        if self.remap_active:
+        if self.remap_active or self.tasks.pending("remap"):
             self.stop_remap()
         else:
             self.start_remap()
 
     def on_closing(self):
-        self.stop_remap()
+        if not self.confirm_discard():
+            return
+        self.device_watcher.stop()
+        self.store.stop_watching()
+        if self.focus_tracker is not None:
+            self.focus_tracker.stop()
+        if self.recorder is not None:
+            self.recorder.stop()
+        self.tasks.shutdown()
+        self.sessions.shutdown()
         self.root.destroy()
 
-def load_last_profile():
-    try:
-        if os.path.exists(LAST_PROFILE_FILE):
-            with open(LAST_PROFILE_FILE, "r") as f:
-                return f.read().strip()
-    except IOError:
-        pass
-    return ""
-
-if __name__ == "__main__":
+def main(timings_file=None):
     root = tk.Tk()
     app = XRemapGUI(root)
-    root.mainloop()
\ No newline at end of file
+    root.mainloop()
+    if timings_file:
+        atomic_write(timings_file, TIMINGS.to_json())
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,308 @@
+import tkinter as tk
+
+from .keys import format_combo, parse_combo
+from .macros import Macro, is_macro_sequence
+
+ROW_PADY = 4
+MODIFIER_KEYSYMS = ("Shift_L", "Shift_R", "Control_L", "Control_R", "Alt_L", "Alt_R", "Meta_L", "Meta_R",
+                    "Super_L", "Super_R")
+MOUSE_BUTTONS = {1: "Button1", 2: "Button2", 3: "Button3", 8: "Button8", 9: "Button9"}
+
+def format_key(key):
+    if isinstance(key, Macro):
+        return key.to_sequence()
+    # Actions that are not key combos (launch, sequences loaded from YAML, ...) are written back untouched.
+    return format_combo(key.strip()) if isinstance(key, str) else key
+
+def remap_to_dict(from_key, to_key):
+    from_key = from_key.strip()
+    if isinstance(to_key, str):
+        to_key = to_key.strip()
+    if not from_key or not to_key:
+        return {}
+    return {format_combo(from_key): format_key(to_key)}
+
+def pairs_to_remap(pairs):
+    remap = {}
+    for from_key, to_key in pairs:
+        for from_combo, to_combo in remap_to_dict(from_key, to_key).items():
+            existing = remap.get(from_combo)
+            if isinstance(existing, str) and isinstance(to_combo, str):
+                remap[from_combo] = [existing, to_combo]
+            elif isinstance(existing, list) and isinstance(to_combo, str) and all(isinstance(t, str) for t in existing):
+                existing.append(to_combo)
+            else:
+                # Recorded macros and other actions are complete sequences; a later binding replaces them.
+                remap[from_combo] = to_combo
+    return remap
+
+def remap_to_pairs(remap):
+    pairs = []
+    for from_key, to_key in (remap or {}).items():
+        from_key = parse_combo(str(from_key))
+        if is_macro_sequence(to_key):
+            to_key = [Macro.from_sequence(to_key)]
+        for target in (to_key if isinstance(to_key, list) else [to_key]):
+            pairs.append((from_key, parse_combo(target) if isinstance(target, str) else target))
+    return pairs
+
+def row_key(from_key, to_key):
+    # Unhashable targets (dicts and lists loaded from YAML) are compared by value through their repr.
+    return from_key, repr(to_key) if isinstance(to_key, (dict, list)) else to_key
+
+class RemapRows:
+    __slots__ = ("from_keys", "to_keys", "saved")
+
+    def __init__(self):
+        self.from_keys = []
+        self.to_keys = []
+        self.saved = []
+
+    def __len__(self):
+        return len(self.from_keys)
+
+    def append(self, from_key="", to_key=""):
+        self.from_keys.append(from_key)
+        self.to_keys.append(to_key)
+
+    def pop(self, index):
+        return self.from_keys.pop(index), self.to_keys.pop(index)
+
+    def set(self, index, side, value):
+        (self.from_keys, self.to_keys)[side][index] = value
+
+    def clear(self):
+        self.from_keys.clear()
+        self.to_keys.clear()
+
+    def items(self):
+        return zip(self.from_keys, self.to_keys)
+
+    def diff(self, pairs):
+        # Compares rows to pairs one from-key at a time. Rows sharing a from-key become an xremap key
+        # sequence, so such a group matches only if its targets are equal and in the same order; other
+        # groups may appear in any order. Returns the indices of rows in groups without a match and the
+        # pairs of those groups, in profile order, to add.
+        wanted = {}
+        for pair in pairs:
+            wanted.setdefault(pair[0], []).append(pair)
+        groups = {}
+        for index, pair in enumerate(zip(self.from_keys, self.to_keys)):
+            groups.setdefault(pair[0], []).append(index)
+        removed = []
+        added = []
+        for from_key, indices in groups.items():
+            group = wanted.pop(from_key, None)
+            if group is not None and len(group) == len(indices) and all(
+                    row_key(*pair) == row_key(from_key, self.to_keys[index]) for pair, index in zip(group, indices)):
+                continue
+            removed.extend(indices)
+            if group is not None:
+                added.extend(group)
+        for group in wanted.values():
+            added.extend(group)
+        removed.sort()
+        return removed, added
+
+    def sync(self, pairs):
+        removed, added = self.diff(pairs)
+        if removed:
+            drop = set(removed)
+            self.from_keys[:] = [key for index, key in enumerate(self.from_keys) if index not in drop]
+            self.to_keys[:] = [key for index, key in enumerate(self.to_keys) if index not in drop]
+        for from_key, to_key in added:
+            self.append(from_key, to_key)
+        return len(removed) + len(added)
+
+    def mark_saved(self, pairs=None):
+        self.saved = list(self.items()) if pairs is None else pairs
+
+    def modified(self):
+        removed, added = self.diff(self.saved)
+        return bool(removed or added)
+
+def capture_combo(button, on_combo, on_cancel):
+    # Reads the next key or mouse combo pressed while the button has focus, e.g. "Ctrl+Shift+a".
+    pressed_modifiers = set()
+
+    def modifiers():
+        mods = []
+        if "Control_L" in pressed_modifiers or "Control_R" in pressed_modifiers:
+            mods.append("Ctrl")
+        if "Alt_L" in pressed_modifiers or "Alt_R" in pressed_modifiers:
+            mods.append("Alt")
+        if "Shift_L" in pressed_modifiers or "Shift_R" in pressed_modifiers:
+            mods.append("Shift")
+        if pressed_modifiers & {"Meta_L", "Meta_R", "Super_L", "Super_R"}:
+            mods.append("Super")
+        return mods
+
+    def release():
+        button.unbind("<KeyPress>")
+        button.unbind("<KeyRelease>")
+        for num in MOUSE_BUTTONS:
+            button.bind(f"<Button-{num}>", lambda e: None)
+        button.unbind("<FocusOut>")
+
+    def finish(combo):
+        release()
+        on_combo(combo)
+        return "break"
+
+    def on_key_press(event):
+        if event.keysym in MODIFIER_KEYSYMS:
+            pressed_modifiers.add(event.keysym)
+            return "break"
+        return finish("+".join(modifiers() + [event.keysym]))
+
+    def on_mouse_click(event):
+        if event.num in MOUSE_BUTTONS:
+            return finish("+".join(modifiers() + [MOUSE_BUTTONS[event.num]]))
+
+    def on_key_release(event):
+        pressed_modifiers.clear()
+
+    def on_focus_out(event):
+        release()
+        on_cancel()
+
+    button.bind("<KeyPress>", on_key_press)
+    button.bind("<KeyRelease>", on_key_release)
+    for num in MOUSE_BUTTONS:
+        button.bind(f"<Button-{num}>", on_mouse_click)
+    button.bind("<FocusOut>", on_focus_out)
+    button.focus_set()
+
+class KeyRemap:
+    def __init__(self, parent, on_change=None, on_remove=None):
+        self.index = -1
+        self.keys = ["", ""]
+        self.on_change = on_change
+        self.on_remove = on_remove
+        self.frame = tk.Frame(parent, bg="#2e2e2e")
+        self.from_button = tk.Button(
+            self.frame,
+            width=10,
+            fg="white",
+            bg="#3c3f41",
+            activebackground="#5c5f61",
+            command=self.set_from_key
+        )
+        self.from_button.pack(side="left", padx=5)
+        tk.Label(self.frame, text="→", fg="white", bg="#2e2e2e").pack(side="left", padx=5)
+
+        self.to_button = tk.Button(
+            self.frame,
+            width=10,
+            fg="white",
+            bg="#3c3f41",
+            activebackground="#5c5f61",
+            command=self.set_to_key
+        )
+        self.to_button.pack(side="left", padx=5)
+
+        tk.Button(self.frame, text="✖", width=1, fg="white", bg="red", command=self.remove).pack(side="left", padx=13)
+
+    def bind(self, index, from_key, to_key):
+        self.index = index
+        if self.keys[0] != from_key:
+            self.keys[0] = from_key
+            self.from_button.config(text=from_key)
+        if self.keys[1] != to_key:
+            self.keys[1] = to_key
+            self.to_button.config(text=str(to_key))
+
+    def set_from_key(self):
+        self._capture_key(0, self.from_button)
+
+    def set_to_key(self):
+        self._capture_key(1, self.to_button)
+
+    def _capture_key(self, side, button):
+        index = self.index
+        button.config(text="...")
+
+        def finish(combo):
+            if index == self.index:
+                self.keys[side] = combo
+                button.config(text=combo)
+            if self.on_change:
+                self.on_change(index, side, combo)
+            self.frame.focus_set()
+
+        def cancel():
+            if index == self.index:
+                button.config(text=self.keys[side] or "key")
+
+        capture_combo(button, finish, cancel)
+
+    def remove(self):
+        if self.on_remove and self.index >= 0:
+            self.on_remove(self.index)
+
+class RemapListView:
+    def __init__(self, parent, model, on_change=None, on_remove=None):
+        self.model = model
+        self.on_change = on_change
+        self.on_remove = on_remove
+        self.rows = []
+        self.row_height = 0
+        self.container = tk.Frame(parent, bg="#2e2e2e")
+        self.canvas = tk.Canvas(self.container, bg="#2e2e2e", highlightthickness=0)
+        self.scrollbar = tk.Scrollbar(self.container, orient="vertical", command=self.canvas.yview)
+        self.canvas.configure(yscrollcommand=self.on_scroll)
+        self.canvas.bind("<Configure>", lambda e: self.update())
+        def on_mouse_wheel(event):
+            if event.num == 4:
+                self.canvas.yview_scroll(-1, "units")
+            elif event.num == 5:
+                self.canvas.yview_scroll(1, "units")
+        self.canvas.bind_all("<Button-4>", on_mouse_wheel)
+        self.canvas.bind_all("<Button-5>", on_mouse_wheel)
+        self.canvas.pack(side="left", fill="both", expand=True)
+        self.scrollbar.pack(side="right", fill="y")
+
+    def _add_row(self):
+        row = KeyRemap(self.canvas, self.on_change, self.on_remove)
+        item = self.canvas.create_window(0, 0, window=row.frame, anchor="n")
+        self.rows.append((row, item))
+        if not self.row_height:
+            row.frame.update_idletasks()
+            self.row_height = row.frame.winfo_reqheight() + 2 * ROW_PADY
+            self.canvas.configure(yscrollincrement=self.row_height)
+
+    def _ensure_pool(self):
+        if not self.rows:
+            self._add_row()
+        needed = max(1, self.canvas.winfo_height()) // self.row_height + 2
+        while len(self.rows) < needed:
+            self._add_row()
+
+    def update(self):
+        self._ensure_pool()
+        height = len(self.model) * self.row_height
+        self.canvas.configure(scrollregion=(0, 0, self.canvas.winfo_width(), height))
+        self.refresh()
+
+    def on_scroll(self, first, last):
+        self.scrollbar.set(first, last)
+        self.refresh()
+
+    def refresh(self):
+        if not self.row_height:
+            return
+        count = len(self.model)
+        first = max(0, int(self.canvas.canvasy(0)) // self.row_height)
+        x = self.canvas.winfo_width() // 2
+        for offset, (row, item) in enumerate(self.rows):
+            index = first + offset
+            if index < count:
+                row.bind(index, self.model.from_keys[index], self.model.to_keys[index])
+                self.canvas.coords(item, x, index * self.row_height + ROW_PADY)
+            else:
+                row.index = -1
+                self.canvas.coords(item, x, -2 * self.row_height)
+
+    def see_end(self):
+        self.update()
+        self.canvas.yview_moveto(1.0)
@@ -0,0 +1,162 @@
+import subprocess
+import threading
+import time
+from collections import namedtuple
+
+from .supervisor import STOP_TIMEOUT, XRemapSupervisor
+
+# The instance started with Start Remap (or by older versions of 'apply'); other sessions are named after their profile.
+MAIN_SESSION = ""
+MAIN_SESSION_LABEL = "(main)"
+
+SessionStatus = namedtuple("SessionStatus", "name state pid uptime restarts devices last_error")
+
+class SessionError(ValueError):
+    pass
+
+def device_conflicts(groups):
+    # groups: iterable of (name, device_paths). Returns (device, first_name, name) for every device
+    # claimed by more than one group; xremap grabs its devices, so a second instance could not read them.
+    owners = {}
+    conflicts = []
+    for name, devices in groups:
+        for device in devices:
+            owner = owners.setdefault(device, name)
+            if owner != name:
+                conflicts.append((device, owner, name))
+    return conflicts
+
+def wait_all(procs, timeout=STOP_TIMEOUT):
+    # One deadline for all processes, so stopping n instances takes at most timeout, not n * timeout.
+    deadline = time.monotonic() + timeout
+    for proc in procs:
+        try:
+            proc.wait(timeout=max(deadline - time.monotonic(), 0))
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.wait()
+
+def format_uptime(seconds):
+    seconds = int(seconds)
+    return f"{seconds // 3600}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+
+def format_status(rows):
+    lines = [f"{'session':<20} {'state':<10} {'pid':>7} {'uptime':>9} {'restarts':>8}  devices"]
+    for row in rows:
+        lines.append(f"{row.name or MAIN_SESSION_LABEL:<20} {row.state:<10} {row.pid or '-':>7} {format_uptime(row.uptime) if row.pid else '-':>9} "
+                     f"{row.restarts:>8}  {', '.join(row.devices) or '-'}")
+        if row.last_error:
+            lines.append(f"{'':<20} {row.last_error}")
+    return "\n".join(lines)
+
+class Session:
+    __slots__ = ("name", "devices", "supervisor")
+
+    def __init__(self, name, supervisor):
+        self.name = name
+        self.devices = []
+        self.supervisor = supervisor
+
+    @property
+    def active(self):
+        # Running, or waiting to be restarted after xremap exited.
+        return self.supervisor.cmd is not None
+
+    @property
+    def state(self):
+        if self.supervisor.running:
+            return "running"
+        return "restarting" if self.active else "stopped"
+
+class SessionManager:
+    # Runs one supervised xremap per device group. Starting and stopping never block on a process:
+    # spawning is a Popen and stopping sends SIGTERM and reaps in the background.
+    def __init__(self, on_state=None, on_line=None, supervisor_factory=XRemapSupervisor):
+        self.on_state = on_state
+        self.on_line = on_line
+        self.supervisor_factory = supervisor_factory
+        self.sessions = {}
+        self._lock = threading.Lock()
+
+    def __contains__(self, name):
+        return name in self.sessions
+
+    def __getitem__(self, name):
+        return self.sessions[name]
+
+    def names(self):
+        return list(self.sessions)
+
+    def session(self, name):
+        with self._lock:
+            session = self.sessions.get(name)
+            if session is None:
+                on_state = (lambda state: self.on_state(name, state)) if self.on_state else None
+                on_line = (lambda line: self.on_line(name, line)) if self.on_line else None
+                session = self.sessions[name] = Session(name, self.supervisor_factory(on_state, on_line))
+            return session
+
+    def supervisor(self, name):
+        return self.session(name).supervisor
+
+    def owner(self, device):
+        # The active session that grabs device, or None.
+        for session in list(self.sessions.values()):
+            if session.active and device in session.devices:
+                return session.name
+        return None
+
+    def conflicts(self, name, devices):
+        # Devices of an active session other than name that would also be grabbed by this one.
+        with self._lock:
+            groups = [(s.name, s.devices) for s in self.sessions.values() if s.active and s.name != name]
+        return [c for c in device_conflicts(groups + [(name, devices)]) if c[2] == name]
+
+    def start(self, name, cmd, devices):
+        self.start_all([(name, cmd, devices)])
+
+    def start_all(self, sessions):
+        # sessions: list of (name, cmd, device_paths). All of them are checked before any is started.
+        sessions = list(sessions)
+        with self._lock:
+            starting = {name for name, _, _ in sessions}
+            groups = [(s.name, s.devices) for s in self.sessions.values() if s.active and s.name not in starting]
+        conflicts = device_conflicts(groups + [(name, devices) for name, _, devices in sessions])
+        if conflicts:
+            device, owner, name = conflicts[0]
+            raise SessionError(f"{device} is already used by session '{owner}'" if owner not in starting else
+                               f"{device} is selected for both '{owner}' and '{name}'")
+        for name, cmd, devices in sessions:
+            session = self.session(name)
+            session.devices = list(devices)
+            session.supervisor.start(cmd)
+
+    def stop(self, name):
+        session = self.sessions.get(name)
+        if session is not None:
+            session.supervisor.stop()
+
+    def stop_all(self):
+        for session in list(self.sessions.values()):
+            session.supervisor.stop()
+
+    def remove(self, name):
+        # Forgets a session; it is stopped first if it is still running.
+        with self._lock:
+            session = self.sessions.pop(name, None)
+        if session is not None:
+            session.supervisor.stop()
+
+    def shutdown(self, timeout=STOP_TIMEOUT):
+        procs = [s.supervisor.proc for s in self.sessions.values() if s.supervisor.proc is not None]
+        self.stop_all()
+        wait_all(procs, timeout)
+
+    def status(self):
+        rows = []
+        for session in list(self.sessions.values()):
+            supervisor = session.supervisor
+            proc = supervisor.proc
+            rows.append(SessionStatus(session.name, session.state, proc.pid if proc is not None else None,
+                                      supervisor.uptime, supervisor.restarts, list(session.devices), supervisor.last_error))
+        return rows
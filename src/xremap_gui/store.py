@@ -0,0 +1,208 @@
+import json
+import os
+import threading
+from collections import OrderedDict
+
+from .fsutil import atomic_write
+from .watch import IN_CLOSE_WRITE, IN_DELETE, IN_MOVED_FROM, IN_MOVED_TO, DirectoryWatcher
+
+PROFILE_SUFFIX = ".yml"
+DEVICES_SUFFIX = ".devices.json"
+PARSE_CACHE_SIZE = 32
+
+_yaml = None
+
+def yaml_codec():
+    # Imported on first use so that commands which never parse YAML skip the import cost.
+    global _yaml
+    if _yaml is None:
+        import yaml
+        # libyaml bindings are an optional part of PyYAML builds.
+        _yaml = (yaml, getattr(yaml, "CSafeLoader", yaml.SafeLoader), getattr(yaml, "CSafeDumper", yaml.SafeDumper))
+    return _yaml
+
+def load_yaml(stream):
+    yaml, loader, _ = yaml_codec()
+    return yaml.load(stream, Loader=loader)
+
+def dump_yaml(data):
+    yaml, _, dumper = yaml_codec()
+    return yaml.dump(data, Dumper=dumper, default_flow_style=False)
+
+class ProfileStore:
+    def __init__(self, profiles_dir, legacy_devices_file=None, last_profile_file=None, cache_size=PARSE_CACHE_SIZE,
+                 load=True):
+        self.profiles_dir = profiles_dir
+        self.legacy_devices_file = legacy_devices_file
+        self.last_profile_file = last_profile_file
+        self.profiles = {}
+        self.watcher = None
+        self._last_profile = None
+        self._parsed = OrderedDict()
+        self.cache_size = cache_size
+        self._lock = threading.Lock()
+        if load:
+            self.reload()
+
+    def path(self, name):
+        return f"{self.profiles_dir}/{name}{PROFILE_SUFFIX}"
+
+    def devices_path(self, name):
+        return f"{self.profiles_dir}/{name}{DEVICES_SUFFIX}"
+
+    def reload(self):
+        try:
+            files = set(os.listdir(self.profiles_dir))
+        except OSError:
+            files = set()
+        names = [f[:-len(PROFILE_SUFFIX)] for f in files if f.endswith(PROFILE_SUFFIX) and not f.startswith(".")]
+        legacy = None
+        profiles = {}
+        for name in names:
+            if f"{name}{DEVICES_SUFFIX}" in files:
+                profiles[name] = self._read_devices(name)
+                continue
+            if legacy is None:
+                legacy = self._read_legacy_devices()
+            profiles[name] = legacy.get(name, [])
+            if profiles[name]:
+                self._write_devices(name, profiles[name])
+        with self._lock:
+            self.profiles = profiles
+
+    def _read_legacy_devices(self):
+        if not self.legacy_devices_file:
+            return {}
+        try:
+            with open(self.legacy_devices_file, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def _read_devices(self, name):
+        try:
+            with open(self.devices_path(name), "r") as f:
+                devices = json.load(f)
+        except (OSError, ValueError):
+            return []
+        return devices if isinstance(devices, list) else []
+
+    def _write_devices(self, name, devices):
+        atomic_write(self.devices_path(name), json.dumps(devices, indent=2))
+
+    def names(self):
+        with self._lock:
+            return sorted(self.profiles)
+
+    def __contains__(self, name):
+        return name in self.profiles
+
+    def devices(self, name):
+        return list(self.profiles.get(name, []))
+
+    def _stamp(self, path):
+        st = os.stat(path)
+        return st.st_mtime_ns, st.st_size
+
+    def _cache(self, path, stamp, profile):
+        with self._lock:
+            self._parsed[path] = (stamp, profile)
+            self._parsed.move_to_end(path)
+            while len(self._parsed) > self.cache_size:
+                self._parsed.popitem(last=False)
+
+    def read(self, name):
+        # Parsed profiles are shared with the cache; callers must not mutate them.
+        path = self.path(name)
+        stamp = self._stamp(path)
+        with self._lock:
+            cached = self._parsed.get(path)
+            if cached is not None and cached[0] == stamp:
+                self._parsed.move_to_end(path)
+                return cached[1]
+        with open(path, "r") as f:
+            profile = load_yaml(f) or {}
+        self._cache(path, stamp, profile)
+        return profile
+
+    def read_text(self, name):
+        with open(self.path(name), "r") as f:
+            return f.read()
+
+    def save_text(self, name, text, devices):
+        path = self.path(name)
+        atomic_write(path, text)
+        with self._lock:
+            self._parsed.pop(path, None)
+        self._write_devices(name, devices)
+        with self._lock:
+            self.profiles[name] = list(devices)
+
+    def save(self, name, profile, devices):
+        path = self.path(name)
+        atomic_write(path, dump_yaml(profile))
+        self._cache(path, self._stamp(path), profile)
+        self._write_devices(name, devices)
+        with self._lock:
+            self.profiles[name] = list(devices)
+
+    def delete(self, name):
+        os.remove(self.path(name))
+        try:
+            os.remove(self.devices_path(name))
+        except FileNotFoundError:
+            pass
+        with self._lock:
+            self.profiles.pop(name, None)
+            self._parsed.pop(self.path(name), None)
+
+    def last_profile(self):
+        if self._last_profile is None:
+            try:
+                with open(self.last_profile_file, "r") as f:
+                    self._last_profile = f.read().strip()
+            except (OSError, TypeError):
+                self._last_profile = ""
+        return self._last_profile
+
+    def set_last_profile(self, name):
+        if self.last_profile_file and name != self.last_profile():
+            atomic_write(self.last_profile_file, name)
+            self._last_profile = name
+
+    def watch(self, callback):
+        self.watcher = DirectoryWatcher(self.profiles_dir, lambda events: self._on_events(events, callback),
+                                        IN_CLOSE_WRITE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO)
+        return self.watcher.start()
+
+    def stop_watching(self):
+        if self.watcher is not None:
+            self.watcher.stop()
+            self.watcher = None
+
+    def _on_events(self, events, callback):
+        changed = set()
+        for filename, _ in events:
+            if filename.startswith("."):
+                continue
+            for suffix in (PROFILE_SUFFIX, DEVICES_SUFFIX):
+                if filename.endswith(suffix):
+                    changed.add(filename[:-len(suffix)])
+                    break
+        if not changed:
+            return
+        updated = {}
+        for name in changed:
+            if os.path.exists(self.path(name)):
+                updated[name] = self._read_devices(name)
+        with self._lock:
+            before = dict(self.profiles)
+            for name in changed:
+                if name in updated:
+                    self.profiles[name] = updated[name]
+                else:
+                    self.profiles.pop(name, None)
+            modified = before != self.profiles
+        if modified:
+            callback()
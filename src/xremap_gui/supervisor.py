@@ -0,0 +1,199 @@
+import os
+import select
+import subprocess
+import threading
+import time
+from collections import deque
+
+OUTPUT_LINES = 200
+STOP_TIMEOUT = 3.0
+MIN_BACKOFF = 0.5
+MAX_BACKOFF = 30.0
+STABLE_AFTER = 10.0
+
+def xremap_command(config_path, device_paths, watch=True):
+    cmd = ["xremap"] + (["--watch=config"] if watch else []) + [config_path]
+    return cmd + [arg for path in device_paths for arg in ["--device", path]]
+
+class XRemapSupervisor:
+    def __init__(self, on_state=None, on_line=None, max_lines=OUTPUT_LINES, stop_timeout=STOP_TIMEOUT,
+                 min_backoff=MIN_BACKOFF, max_backoff=MAX_BACKOFF, stable_after=STABLE_AFTER):
+        self.on_state = on_state
+        self.on_line = on_line
+        self.output = deque(maxlen=max_lines)
+        self.stop_timeout = stop_timeout
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self.stable_after = stable_after
+        self.cmd = None
+        self.proc = None
+        self.started_at = None
+        self.restarts = 0
+        self.last_error = ""
+        self.last_exit = None
+        self._backoff = min_backoff
+        self._timer = None
+        self._replacing = False
+        self._lock = threading.Lock()
+
+    @property
+    def running(self):
+        return self.proc is not None
+
+    @property
+    def uptime(self):
+        started_at = self.started_at
+        return time.monotonic() - started_at if started_at is not None and self.proc is not None else 0.0
+
+    def start(self, cmd):
+        with self._lock:
+            self.cmd = list(cmd)
+            self._cancel_timer()
+            self.restarts = 0
+            self.last_error = ""
+            self._backoff = self.min_backoff
+            if self.proc is not None:
+                self._replacing = True
+                self._terminate(self.proc)
+                return
+            states = self._spawn()
+        self._emit(states)
+
+    def stop(self):
+        with self._lock:
+            self.cmd = None
+            self._replacing = False
+            self._cancel_timer()
+            proc = self.proc
+            if proc is not None:
+                self._terminate(proc)
+                return
+        self._emit(["stopped"])
+
+    def shutdown(self, timeout=STOP_TIMEOUT):
+        proc = self.proc
+        self.stop()
+        if proc is not None:
+            try:
+                proc.wait(timeout=timeout)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+                proc.wait()
+
+    def _cancel_timer(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def _emit(self, states):
+        if self.on_state:
+            for state in states:
+                self.on_state(state)
+
+    def _spawn(self):
+        try:
+            proc = subprocess.Popen(self.cmd, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                    start_new_session=True)
+        except OSError as e:
+            self.last_error = str(e)
+            self.cmd = None
+            return ["failed", "stopped"]
+        self.proc = proc
+        self.started_at = time.monotonic()
+        threading.Thread(target=self._monitor, args=(proc,), daemon=True).start()
+        return ["started"]
+
+    def _terminate(self, proc):
+        try:
+            proc.terminate()
+        except OSError:
+            return
+        threading.Thread(target=self._reap, args=(proc,), daemon=True).start()
+
+    def _reap(self, proc):
+        try:
+            proc.wait(timeout=self.stop_timeout)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+    def _restart(self):
+        with self._lock:
+            self._timer = None
+            if self.cmd is None or self.proc is not None:
+                return
+            self.restarts += 1
+            states = self._spawn()
+        self._emit(states)
+
+    def _exit_fd(self, proc):
+        pidfd_open = getattr(os, "pidfd_open", None)
+        if pidfd_open is not None:
+            try:
+                return pidfd_open(proc.pid)
+            except OSError:
+                pass
+        read_fd, write_fd = os.pipe()
+        def wait():
+            proc.wait()
+            os.close(write_fd)
+        threading.Thread(target=wait, daemon=True).start()
+        return read_fd
+
+    def _monitor(self, proc):
+        out_fd = proc.stdout.fileno()
+        exit_fd = self._exit_fd(proc)
+        pending = b""
+        watched = [out_fd, exit_fd]
+        exited = False
+        while out_fd in watched:
+            readable, _, _ = select.select(watched, [], [], 0 if exited else None)
+            if not readable:
+                break
+            if exit_fd in readable:
+                watched.remove(exit_fd)
+                exited = True
+            if out_fd in readable:
+                data = os.read(out_fd, 4096)
+                if not data:
+                    watched.remove(out_fd)
+                lines = (pending + data).split(b"\n")
+                pending = lines.pop() if data else b""
+                for line in lines:
+                    self._add_line(line.decode(errors="replace").rstrip())
+        if pending:
+            self._add_line(pending.decode(errors="replace").rstrip())
+        returncode = proc.wait()
+        os.close(exit_fd)
+        proc.stdout.close()
+        self._on_exit(proc, returncode)
+
+    def _add_line(self, line):
+        if not line:
+            return
+        self.output.append(line)
+        if self.on_line:
+            self.on_line(line)
+
+    def _on_exit(self, proc, returncode):
+        with self._lock:
+            if proc is not self.proc:
+                return
+            uptime = time.monotonic() - self.started_at
+            self.proc = None
+            self.last_exit = returncode
+            if self.cmd is None:
+                states = ["stopped"]
+            elif self._replacing:
+                self._replacing = False
+                states = self._spawn()
+            else:
+                self.last_error = self.output[-1] if self.output else f"xremap exited with status {returncode}"
+                if uptime >= self.stable_after:
+                    self._backoff = self.min_backoff
+                delay = self._backoff
+                self._backoff = min(self._backoff * 2, self.max_backoff)
+                self._timer = threading.Timer(delay, self._restart)
+                self._timer.daemon = True
+                self._timer.start()
+                states = ["exited"]
+        self._emit(states)
@@ -0,0 +1,116 @@
+import queue
+import sys
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+TASK_WORKERS = 4
+
+class Task:
+    __slots__ = ("label", "key", "func", "on_done", "on_error", "state", "cancelled", "future")
+
+    def __init__(self, label, func, on_done=None, on_error=None, key=None):
+        self.label = label
+        self.key = key
+        self.func = func
+        self.on_done = on_done
+        self.on_error = on_error
+        self.state = "pending"
+        self.cancelled = False
+        self.future = None
+
+    def cancel(self):
+        # A task that already started runs to completion, but its callbacks are never called.
+        self.cancelled = True
+
+class TaskRunner:
+    def __init__(self, notify, workers=TASK_WORKERS):
+        # notify() is called from worker threads when results are waiting and must wake the UI thread,
+        # which then calls dispatch().
+        self.notify = notify
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="xremap-gui-task")
+        self.results = queue.Queue()
+        self.active = []
+        self.keyed = {}
+        self._lock = threading.Lock()
+        self._key_locks = {}
+
+    def submit(self, label, func, on_done=None, on_error=None, key=None):
+        # Submitting a task under a key cancels the previous task with that key. Tasks with the same key
+        # never run at the same time, so a cancelled one that already started finishes before the next.
+        task = Task(label, func, on_done, on_error, key)
+        with self._lock:
+            if key is not None:
+                previous = self.keyed.get(key)
+                if previous is not None:
+                    previous.cancel()
+                self.keyed[key] = task
+                self._key_locks.setdefault(key, threading.Lock())
+            self.active.append(task)
+            task.future = self.executor.submit(self._run, task)
+        self.notify()
+        return task
+
+    def cancel(self, key):
+        with self._lock:
+            task = self.keyed.pop(key, None)
+        if task is not None:
+            task.cancel()
+            self.notify()
+
+    def pending(self, key):
+        with self._lock:
+            return key in self.keyed
+
+    def _run(self, task):
+        if task.key is None:
+            result, error = self._call(task)
+        else:
+            with self._key_locks[task.key]:
+                result, error = self._call(task)
+        task.state = "failed" if error is not None else "done"
+        self.results.put((task, result, error))
+        self.notify()
+
+    def _call(self, task):
+        result = error = None
+        if not task.cancelled:
+            task.state = "running"
+            try:
+                result = task.func()
+            except Exception as e:
+                error = e
+        return result, error
+
+    def dispatch(self):
+        # Runs on the UI thread.
+        while True:
+            try:
+                task, result, error = self.results.get_nowait()
+            except queue.Empty:
+                return
+            with self._lock:
+                self.active.remove(task)
+                if task.key is not None and self.keyed.get(task.key) is task:
+                    del self.keyed[task.key]
+            if task.cancelled:
+                continue
+            if error is not None:
+                if task.on_error is not None:
+                    task.on_error(error)
+                else:
+                    traceback.print_exception(type(error), error, error.__traceback__, file=sys.stderr)
+            elif task.on_done is not None:
+                task.on_done(result)
+
+    def labels(self):
+        with self._lock:
+            return [task.label for task in self.active if task.label and not task.cancelled]
+
+    def shutdown(self):
+        # Futures are cancelled one by one: Executor.shutdown(cancel_futures=True) needs Python 3.9.
+        with self._lock:
+            for task in self.active:
+                task.cancel()
+                task.future.cancel()
+        self.executor.shutdown(wait=False)
@@ -0,0 +1,64 @@
+import json
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+class Timings:
+    def __init__(self):
+        self.stats = {}
+        self._lock = threading.Lock()
+
+    def record(self, name, seconds):
+        with self._lock:
+            stat = self.stats.get(name)
+            if stat is None:
+                self.stats[name] = [1, seconds, seconds, seconds, seconds]
+            else:
+                stat[0] += 1
+                stat[1] += seconds
+                stat[2] = min(stat[2], seconds)
+                stat[3] = max(stat[3], seconds)
+                stat[4] = seconds
+
+    @contextmanager
+    def span(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - started)
+
+    def timed(self, name):
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.span(name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def clear(self):
+        with self._lock:
+            self.stats.clear()
+
+    def snapshot(self):
+        with self._lock:
+            stats = {name: list(stat) for name, stat in self.stats.items()}
+        return {name: {"count": count, "last_ms": round(last * 1000, 3), "mean_ms": round(total / count * 1000, 3),
+                       "min_ms": round(low * 1000, 3), "max_ms": round(high * 1000, 3)}
+                for name, (count, total, low, high, last) in sorted(stats.items())}
+
+    def to_json(self):
+        return json.dumps(self.snapshot(), indent=2)
+
+    def format_table(self):
+        lines = [f"{'span':<24}{'count':>7}{'last ms':>11}{'mean ms':>11}{'max ms':>11}"]
+        for name, stat in self.snapshot().items():
+            lines.append(f"{name:<24}{stat['count']:>7}{stat['last_ms']:>11.1f}{stat['mean_ms']:>11.1f}{stat['max_ms']:>11.1f}")
+        return "\n".join(lines)
+
+TIMINGS = Timings()
+record = TIMINGS.record
+span = TIMINGS.span
+timed = TIMINGS.timed
@@ -0,0 +1,124 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import threading
+
+from .devices import DEV_INPUT_DIR, SYS_INPUT_DIR, read_sysfs_device
+
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = os.O_CLOEXEC
+
+EVENT_HEADER = struct.Struct("iIII")
+READ_SIZE = 64 * 1024
+
+_libc = None
+
+def _inotify():
+    global _libc
+    if _libc is None:
+        _libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        _libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+    return _libc
+
+def parse_events(data):
+    events = []
+    offset = 0
+    while offset + EVENT_HEADER.size <= len(data):
+        _, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+        offset += EVENT_HEADER.size
+        name = data[offset:offset + length].rstrip(b"\0").decode(errors="replace")
+        offset += length
+        events.append((name, mask))
+    return events
+
+class DirectoryWatcher:
+    def __init__(self, path, callback, mask=IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO):
+        self.path = path
+        self.callback = callback
+        self.mask = mask
+        self.fd = -1
+        self.thread = None
+        self._wake_r = self._wake_w = -1
+        self._lock = threading.Lock()
+        self._stopped = None
+
+    def start(self):
+        try:
+            libc = _inotify()
+            fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+            if fd < 0:
+                return False
+            if libc.inotify_add_watch(fd, os.fsencode(self.path), self.mask) < 0:
+                os.close(fd)
+                return False
+        except (OSError, AttributeError):
+            return False
+        self.fd = fd
+        self._wake_r, self._wake_w = os.pipe()
+        self._stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, args=(fd, self._wake_r, self._wake_w, self._stopped),
+                                       daemon=True)
+        self.thread.start()
+        return True
+
+    def stop(self):
+        # Not joined: the callback may be waiting on the Tk thread, which is usually the caller. The watcher
+        # thread closes its descriptors itself once it sees the wake-up.
+        if self.thread is None:
+            return
+        with self._lock:
+            self._stopped.set()
+            if self._wake_w >= 0:
+                os.write(self._wake_w, b"\0")
+            self.fd = self._wake_r = self._wake_w = -1
+        self.thread = None
+
+    def _run(self, fd, wake_r, wake_w, stopped):
+        try:
+            while True:
+                readable, _, _ = select.select([fd, wake_r], [], [])
+                if wake_r in readable:
+                    return
+                try:
+                    data = os.read(fd, READ_SIZE)
+                except BlockingIOError:
+                    continue
+                events = parse_events(data)
+                if events and not stopped.is_set():
+                    self.callback(events)
+        finally:
+            with self._lock:
+                if self._wake_w == wake_w:
+                    self.fd = self._wake_r = self._wake_w = -1
+                for owned in (fd, wake_r, wake_w):
+                    os.close(owned)
+
+class DeviceWatcher(DirectoryWatcher):
+    def __init__(self, callback, path=DEV_INPUT_DIR, sys_root=SYS_INPUT_DIR):
+        super().__init__(path, self._on_events)
+        self.on_change = callback
+        self.sys_root = sys_root
+
+    def _on_events(self, events):
+        present = {}
+        for name, mask in events:
+            if name.startswith("event"):
+                present[name] = bool(mask & (IN_CREATE | IN_MOVED_TO))
+        added = []
+        removed = []
+        for event, exists in present.items():
+            if not exists:
+                removed.append(event)
+            elif (device := read_sysfs_device(event, self.sys_root)) is not None:
+                added.append(device)
+        if added or removed:
+            self.on_change(added, removed)
@@ -0,0 +1,45 @@
+import re
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+XPROP_WORKERS = 8
+WM_CLASS_RE = re.compile(r'WM_CLASS.*?= "([^"]+)", "([^"]+)"')
+
+def list_windows(max_workers=XPROP_WORKERS):
+    try:
+        return _windows_from_wmctrl()
+    except (subprocess.SubprocessError, OSError):
+        pass
+    try:
+        output = subprocess.check_output(["wmctrl", "-l"], text=True)
+    except (subprocess.SubprocessError, OSError):
+        return {}
+    win_ids = [line.split()[0] for line in output.splitlines() if line.strip()]
+    if not win_ids:
+        return {}
+    # Older wmctrl builds lack -x; fall back to one xprop per window, run concurrently.
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(win_ids)))) as pool:
+        classes = pool.map(query_wm_class, win_ids)
+    return {win_id: wm_class for win_id, wm_class in zip(win_ids, classes) if wm_class}
+
+def list_wm_classes(max_workers=XPROP_WORKERS):
+    return set(list_windows(max_workers).values())
+
+def query_wm_class(win_id):
+    try:
+        output = subprocess.check_output(["xprop", "-id", win_id, "WM_CLASS"], text=True)
+    except (subprocess.SubprocessError, OSError):
+        return None
+    match = WM_CLASS_RE.search(output)
+    return f"{match.group(1)}.{match.group(2)}" if match else None
+
+def _windows_from_wmctrl():
+    return parse_wmctrl_classes(subprocess.check_output(["wmctrl", "-lx"], text=True, stderr=subprocess.DEVNULL))
+
+def parse_wmctrl_classes(output):
+    windows = {}
+    for line in output.splitlines():
+        parts = line.split(None, 3)
+        if len(parts) >= 3 and "." in parts[2]:
+            windows[parts[0]] = parts[2]
+    return windows
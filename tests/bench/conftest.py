@@ -0,0 +1,74 @@
+import pytest
+
+from xremap_gui import remap_list
+
+VIEW_WIDTH = 400
+VIEW_HEIGHT = 600
+ROW_HEIGHT = 30
+
+class FakeVar:
+    def __init__(self, master=None, value=""):
+        self.value = value
+
+    def get(self):
+        return self.value
+
+    def set(self, value):
+        self.value = value
+
+class FakeWidget:
+    # Stands in for any Tk widget: geometry queries return a fixed viewport, everything else is a no-op.
+    def __init__(self, master=None, **options):
+        self.master = master
+        self.options = options
+        self.items = {}
+        self.scroll_y = 0
+
+    def configure(self, **options):
+        self.options.update(options)
+
+    config = configure
+
+    def winfo_width(self):
+        return VIEW_WIDTH
+
+    def winfo_height(self):
+        return VIEW_HEIGHT
+
+    def winfo_reqheight(self):
+        return ROW_HEIGHT
+
+    def canvasy(self, y):
+        return self.scroll_y + y
+
+    def create_window(self, x, y, **options):
+        item = len(self.items) + 1
+        self.items[item] = (x, y)
+        return item
+
+    def coords(self, item, x, y):
+        self.items[item] = (x, y)
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: None
+
+class FakeTk:
+    # Counts every widget created, which is what the recycled row pool keeps bounded.
+    def __init__(self):
+        self.widgets = 0
+        fake = self
+
+        class Widget(FakeWidget):
+            def __init__(self, master=None, **options):
+                fake.widgets += 1
+                super().__init__(master, **options)
+
+        self.Frame = self.Canvas = self.Scrollbar = self.Button = self.Label = Widget
+        self.StringVar = FakeVar
+
+@pytest.fixture
+def fake_tk(monkeypatch):
+    # There is no display in CI; the widget layer is replaced so the list code itself is what gets timed.
+    tk = FakeTk()
+    monkeypatch.setattr(remap_list, "tk", tk)
+    return tk
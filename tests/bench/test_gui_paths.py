@@ -0,0 +1,88 @@
+import random
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from xremap_gui.bench import layered_profile, synthetic_rows
+from xremap_gui.devices import DeviceIndex
+from xremap_gui.remap import XRemapGUI
+from xremap_gui.remap_list import RemapListView, RemapRows
+from xremap_gui.store import ProfileStore
+
+ROWS = 10000
+LAYERS = 20
+DEVICES = ["input:0003:046d:c52b:usb-0000:00:14.0-1/input0"]
+
+@pytest.fixture
+def pairs():
+    return synthetic_rows(ROWS)
+
+@pytest.fixture
+def other_pairs(pairs):
+    # A similar profile: 1% of the bindings differ and the order is shuffled.
+    other = synthetic_rows(ROWS // 100, seed=1) + pairs[ROWS // 100:]
+    random.Random(2).shuffle(other)
+    return other
+
+@pytest.fixture
+def profiles_dir(tmp_path, pairs):
+    store = ProfileStore(str(tmp_path / "profiles"))
+    store.save("bench", layered_profile("bench", pairs, LAYERS), DEVICES)
+    return str(tmp_path / "profiles")
+
+def gui_state(profiles_dir, dev_dir):
+    # read_profile only needs the store and the device index of the window.
+    return SimpleNamespace(store=ProfileStore(profiles_dir), device_index=DeviceIndex(dev_dir, dev_dir))
+
+def test_row_pool_update(benchmark, fake_tk, pairs):
+    model = RemapRows()
+    model.sync(pairs)
+    view = RemapListView(None, model)
+    benchmark(view.update)
+    # Only the rows that fit the viewport exist, however long the list is.
+    assert len(view.rows) < 30
+    assert fake_tk.widgets < 200
+
+def test_row_pool_scroll(benchmark, fake_tk, pairs):
+    model = RemapRows()
+    model.sync(pairs)
+    view = RemapListView(None, model)
+    view.update()
+    positions = [i * len(pairs) // 100 * view.row_height for i in range(100)]
+
+    def scroll():
+        for y in positions:
+            view.canvas.scroll_y = y
+            view.refresh()
+
+    benchmark(scroll)
+    assert view.rows[0][0].index == positions[-1] // view.row_height
+
+def test_profile_load(benchmark, profiles_dir, tmp_path):
+    # Cold read: a new store per round, so the parse cache does not hide the YAML load.
+    result = benchmark.pedantic(lambda gui: XRemapGUI.read_profile(gui, "bench"),
+                                setup=lambda: ((gui_state(profiles_dir, str(tmp_path)),), {}), rounds=5)
+    base_pairs, layers, extra, devices, events, app = result
+    assert len(layers) == LAYERS
+    assert devices == DEVICES
+    assert base_pairs
+
+def test_profile_switch_rebuild(benchmark, fake_tk, pairs, other_pairs):
+    model = RemapRows()
+    view = RemapListView(None, model)
+
+    def setup():
+        model.clear()
+        model.sync(pairs)
+        view.update()
+        return (), {}
+
+    def switch():
+        if model.sync(other_pairs):
+            view.update()
+        model.mark_saved()
+
+    benchmark.pedantic(switch, setup=setup, rounds=10)
+    assert not model.diff(other_pairs)[1]
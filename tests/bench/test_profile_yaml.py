@@ -0,0 +1,46 @@
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+yaml = pytest.importorskip("yaml")
+
+from xremap_gui.bench import layered_profile, synthetic_rows
+from xremap_gui.store import ProfileStore, dump_yaml, load_yaml
+
+ROWS = 10000
+LAYERS = 20
+
+@pytest.fixture(scope="module")
+def profile():
+    return layered_profile("bench", synthetic_rows(ROWS), LAYERS)
+
+@pytest.fixture
+def store(tmp_path, profile):
+    store = ProfileStore(str(tmp_path))
+    store.save("bench", profile, [])
+    return store
+
+@pytest.fixture
+def text(profile):
+    return dump_yaml(profile)
+
+def test_parse_before(benchmark, text, profile):
+    # The parse before the change: PyYAML's pure-Python safe loader on every read.
+    assert benchmark.pedantic(yaml.safe_load, args=(text,), rounds=3) == profile
+
+def test_parse_libyaml(benchmark, text, profile):
+    if not getattr(yaml, "__with_libyaml__", False):
+        pytest.skip("PyYAML built without libyaml")
+    assert benchmark.pedantic(load_yaml, args=(text,), rounds=3) == profile
+
+def test_dump_before(benchmark, profile):
+    assert benchmark.pedantic(yaml.safe_dump, args=(profile,), kwargs={"default_flow_style": False}, rounds=3)
+
+def test_dump_libyaml(benchmark, profile):
+    if not getattr(yaml, "__with_libyaml__", False):
+        pytest.skip("PyYAML built without libyaml")
+    assert benchmark.pedantic(dump_yaml, args=(profile,), rounds=3)
+
+def test_read_cached(benchmark, store, profile):
+    # A repeat read of an unchanged file costs one stat.
+    store.read("bench")
+    assert benchmark(store.read, "bench") == profile
@@ -0,0 +1,78 @@
+import tracemalloc
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from xremap_gui import remap_list
+from xremap_gui.bench import synthetic_rows
+from xremap_gui.remap_list import RemapListView, RemapRows
+
+ROWS = 10000
+
+class BaselineRow:
+    # The row before the pool: a frame, three buttons, a label and two StringVars for every binding.
+    def __init__(self, parent, from_key, to_key):
+        tk = remap_list.tk
+        self.from_key = tk.StringVar(value=from_key)
+        self.to_key = tk.StringVar(value=to_key)
+        self.frame = tk.Frame(parent, bg="#2e2e2e")
+        self.frame.pack(fill="x", padx=30, pady=4, anchor="center")
+        self.from_button = tk.Button(self.frame, text=from_key, width=10, fg="white", bg="#3c3f41")
+        self.from_button.pack(side="left", padx=5)
+        tk.Label(self.frame, text="→", fg="white", bg="#2e2e2e").pack(side="left", padx=5)
+        self.to_button = tk.Button(self.frame, text=to_key, width=10, fg="white", bg="#3c3f41")
+        self.to_button.pack(side="left", padx=5)
+        tk.Button(self.frame, text="✖", width=1, fg="white", bg="red").pack(side="left", padx=13)
+
+def baseline_load(pairs):
+    frame = remap_list.tk.Frame(None)
+    return [BaselineRow(frame, from_key, to_key) for from_key, to_key in pairs]
+
+def pooled_load(pairs):
+    model = RemapRows()
+    model.sync(pairs)
+    view = RemapListView(None, model)
+    view.update()
+    return model, view
+
+def traced_memory(func, *args):
+    tracemalloc.start()
+    try:
+        result = func(*args)
+        # (retained, peak): what the loaded list keeps alive, and the high-water mark while building it.
+        return tracemalloc.get_traced_memory(), result
+    finally:
+        tracemalloc.stop()
+
+@pytest.fixture
+def pairs():
+    return [(from_key, str(to_key)) for from_key, to_key in synthetic_rows(ROWS)]
+
+def test_load_before(benchmark, fake_tk, pairs):
+    rows = benchmark.pedantic(baseline_load, args=(pairs,), rounds=3)
+    assert len(rows) == ROWS
+
+def test_load_pooled(benchmark, fake_tk, pairs):
+    model, view = benchmark.pedantic(pooled_load, args=(pairs,), rounds=3)
+    assert len(model) == ROWS
+
+@pytest.mark.parametrize("size", [100, 1000, ROWS])
+def test_traced_memory_fake_widgets(fake_tk, size, record_property):
+    # tracemalloc over the fake widgets, not process RSS: they only hold their options, so this is a lower
+    # bound on the Python side of a real Tk list. The widget count is what each real row also costs in the
+    # Tcl interpreter. The numbers are kept as junitxml properties.
+    pairs = [(from_key, str(to_key)) for from_key, to_key in synthetic_rows(size)]
+    before, _ = traced_memory(baseline_load, pairs)
+    before_widgets = fake_tk.widgets
+    fake_tk.widgets = 0
+    after, _ = traced_memory(pooled_load, pairs)
+    for label, widgets, (retained, peak) in (("per_row", before_widgets, before), ("pooled", fake_tk.widgets, after)):
+        record_property(f"{label}_widgets", widgets)
+        record_property(f"{label}_traced_retained_kib", round(retained / 1024))
+        record_property(f"{label}_traced_peak_kib", round(peak / 1024))
+    # The pool only covers the viewport, whatever the size of the profile.
+    assert before_widgets > 5 * size
+    assert fake_tk.widgets < 100
+    assert after[0] * 3 < before[0]
+    assert after[1] * 3 < before[1]
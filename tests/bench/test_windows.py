@@ -0,0 +1,56 @@
+import os
+import re
+import subprocess
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from xremap_gui.bench import synthetic_wmctrl_output
+from xremap_gui.windows import list_wm_classes
+
+WINDOWS = 40
+# xprop connects to the X server and waits for a reply; the stub models that round trip.
+XPROP_LATENCY = 0.01
+
+def write_script(path, body):
+    path.write_text("#!/bin/sh\n" + body)
+    path.chmod(0o755)
+
+@pytest.fixture
+def x_tools(tmp_path, monkeypatch):
+    # Stand-ins for wmctrl and xprop that print canned output, so the cost measured is the process spawns
+    # and the X round trips.
+    listing = tmp_path / "wmctrl-lx.txt"
+    listing.write_text(synthetic_wmctrl_output(WINDOWS) + "\n")
+    plain = tmp_path / "wmctrl-l.txt"
+    plain.write_text("".join(f"0x{0x3c00000 + i:08x}  0 host  Window {i}\n" for i in range(WINDOWS)))
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    write_script(bin_dir / "wmctrl", f'[ "$1" = -lx ] && [ -z "$NO_WMCTRL_X" ] && exec cat {listing}\n'
+                                     f'[ "$1" = -l ] && exec cat {plain}\nexit 1\n')
+    write_script(bin_dir / "xprop", f'sleep {XPROP_LATENCY}\necho \'WM_CLASS(STRING) = "app", "App"\'\n')
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    return monkeypatch
+
+def baseline_wm_classes():
+    # The scan before the change: one xprop per window, run one after the other on the Tk thread.
+    output = subprocess.check_output(["wmctrl", "-l"]).decode()
+    classes = set()
+    for line in output.splitlines():
+        if line.strip():
+            xprop = subprocess.check_output(["xprop", "-id", line.split()[0], "WM_CLASS"]).decode()
+            match = re.search(r'WM_CLASS.*?= "([^"]+)", "([^"]+)"', xprop)
+            if match:
+                classes.add(f"{match.group(1)}.{match.group(2)}")
+    return classes
+
+def test_wm_classes_before(benchmark, x_tools):
+    assert benchmark.pedantic(baseline_wm_classes, rounds=3) == {"app.App"}
+
+def test_wm_classes_wmctrl_x(benchmark, x_tools):
+    assert len(benchmark(list_wm_classes)) == 40
+
+def test_wm_classes_xprop_pool(benchmark, x_tools):
+    x_tools.setenv("NO_WMCTRL_X", "1")
+    assert benchmark.pedantic(list_wm_classes, rounds=3) == {"app.App"}
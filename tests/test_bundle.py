@@ -0,0 +1,60 @@
+import pytest
+
+from xremap_gui.bundle import HEADER, Bundle, BundleError, export_profiles, import_profiles, write_bundle
+from xremap_gui.store import ProfileStore
+
+MAIN = "keymap:\n- name: main\n  remap:\n    CAPSLOCK: ESC\n"
+PAD = "keymap:\n- name: pad\n  remap:\n    KP1: F13\n"
+
+@pytest.fixture
+def store(tmp_path):
+    store = ProfileStore(str(tmp_path / "profiles"))
+    (tmp_path / "profiles").mkdir()
+    store.save_text("main", MAIN, ["by-id:usb-Keyboard-event-kbd"])
+    store.save_text("pad", PAD, ["event7"])
+    return store
+
+def test_round_trip(store, tmp_path):
+    path = str(tmp_path / "profiles.xrgb")
+    assert export_profiles(store, path) == 2
+    with Bundle(path) as bundle:
+        assert bundle.names() == ["main", "pad"]
+        assert bundle.read_text("pad") == PAD
+        assert bundle.devices("main") == ["by-id:usb-Keyboard-event-kbd"]
+
+    target = ProfileStore(str(tmp_path / "imported"))
+    (tmp_path / "imported").mkdir()
+    target.save_text("pad", "keymap: []\n", [])
+    assert import_profiles(target, path) == (["main"], ["pad"])
+    assert target.read_text("pad") == "keymap: []\n"
+    assert import_profiles(target, path, ["pad"], overwrite=True) == (["pad"], [])
+    assert target.read_text("main") == MAIN and target.read_text("pad") == PAD
+    assert target.devices("main") == ["by-id:usb-Keyboard-event-kbd"]
+    assert target.devices("pad") == ["event7"]
+
+def test_rejects_unknown_and_invalid_names(store, tmp_path):
+    path = str(tmp_path / "profiles.xrgb")
+    write_bundle(path, [("../escape", MAIN, [])])
+    with pytest.raises(BundleError, match="no profile named 'games'"):
+        import_profiles(store, path, ["games"])
+    with pytest.raises(BundleError, match="invalid profile name"):
+        import_profiles(store, path)
+
+@pytest.mark.parametrize("damage, message", [
+    (lambda data: b"", "not a profile bundle"),
+    (lambda data: b"ZZZZ" + data[4:], "not a profile bundle"),
+    (lambda data: data[:HEADER.size + 3], "truncated table of contents"),
+    (lambda data: data[:6] + bytes([9]) + data[7:], "corrupt table of contents"),  # more entries than it holds
+    (lambda data: data[:-4] + bytes(4), "profile 'main' is corrupt"),
+    (lambda data: data.replace(b'["event3"]', b'["event3"}'), "device list of 'main' is corrupt"),
+    (lambda data: data.replace(b'["event3"]', b'{"ev":"3"}'), "device list of 'main' is corrupt"),
+])
+def test_corrupt_bundles(tmp_path, store, damage, message):
+    path = tmp_path / "profiles.xrgb"
+    write_bundle(str(path), [("main", MAIN, ["event3"])])
+    path.write_bytes(damage(path.read_bytes()))
+    with pytest.raises(BundleError, match=message):
+        import_profiles(store, str(path), overwrite=True)
+    # Nothing is written from a bundle that fails to read.
+    assert store.read_text("main") == MAIN
+    assert store.devices("main") == ["by-id:usb-Keyboard-event-kbd"]
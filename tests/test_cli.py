@@ -0,0 +1,105 @@
+import functools
+import os
+import subprocess
+import time
+
+import pytest
+
+from xremap_gui import cli
+from xremap_gui.devices import DeviceIndex
+from xremap_gui.store import ProfileStore
+
+# Stands in for xremap: runs until SIGTERM. Its command line keeps "xremap" and the --device arguments,
+# which is what 'status' and 'stop' read back from /proc.
+XREMAP_STUB = "#!/bin/sh\ntrap 'exit 0' TERM\nwhile :; do sleep 0.05; done\n"
+
+@pytest.fixture
+def env(tmp_path, monkeypatch):
+    if not os.path.isdir("/proc/self"):
+        pytest.skip("needs /proc")
+    config = tmp_path / "config"
+    sessions = tmp_path / "run" / "sessions"
+    dev = tmp_path / "dev"
+    bin_dir = tmp_path / "bin"
+    for directory in (config / "profiles", sessions, dev, bin_dir):
+        directory.mkdir(parents=True)
+    for event in ("event1", "event2", "event3"):
+        (dev / event).touch()
+    (bin_dir / "xremap").write_text(XREMAP_STUB)
+    (bin_dir / "xremap").chmod(0o755)
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    monkeypatch.setattr(cli, "PROFILES_DIR", str(config / "profiles"))
+    monkeypatch.setattr(cli, "DEVICES_FILE", str(config / "devices.json"))
+    monkeypatch.setattr(cli, "LAST_PROFILE_FILE", str(config / "last_profile.txt"))
+    monkeypatch.setattr(cli, "PID_FILE", str(tmp_path / "run" / "xremap.pid"))
+    monkeypatch.setattr(cli, "SESSIONS_DIR", str(sessions))
+    monkeypatch.setattr(cli, "ensure_dirs", lambda: None)
+    monkeypatch.setattr(cli, "DeviceIndex", functools.partial(DeviceIndex, str(dev), str(tmp_path / "sys")))
+    store = ProfileStore(str(config / "profiles"))
+    store.save("main", {"keymap": [{"name": "main", "remap": {"CAPSLOCK": "ESC"}}]}, ["event1"])
+    store.save("pad", {"keymap": [{"name": "pad", "remap": {"KP1": "F13"}}]}, ["event2"])
+    store.save("clash", {"keymap": [{"name": "clash", "remap": {"A": "B"}}]}, ["event2", "event3"])
+    yield sessions
+    cli.stop_xremap(cli.session_pid_files().values())
+
+def run(*argv):
+    with pytest.raises(SystemExit) as exit_info:
+        cli.main(list(argv))
+    return exit_info.value.code
+
+def running():
+    # Waits until every instance has exec'd the stub, then returns {profile: devices}.
+    deadline = time.monotonic() + 5
+    while True:
+        pids = {name: cli.read_pid(pid_file) for name, pid_file in cli.session_pid_files().items()}
+        if all(pids.values()) or time.monotonic() > deadline:
+            return {name: cli.session_devices(pid) for name, pid in pids.items() if pid}
+
+def test_apply_add_and_stop_one(env, capsys):
+    dev = env.parent.parent / "dev"
+    assert run("apply", "main") == 0
+    assert run("apply", "pad", "--add") == 0
+    assert running() == {"main": [f"{dev}/event1"], "pad": [f"{dev}/event2"]}
+    main_pid = cli.read_pid(f"{env}/main.pid")
+
+    # 'clash' wants a device 'pad' holds; nothing is started or stopped.
+    assert run("apply", "clash", "--add") == 1
+    assert "event2 is used by both 'pad' and 'clash'" in capsys.readouterr().err
+    assert set(running()) == {"main", "pad"}
+
+    assert run("status") == 0
+    out = capsys.readouterr().out
+    assert "main" in out and "pad" in out and "running" in out
+
+    assert run("stop", "pad") == 0
+    assert running() == {"main": [f"{dev}/event1"]}
+    assert cli.read_pid(f"{env}/main.pid") == main_pid
+    assert run("stop", "pad") == 1
+    assert run("stop") == 0
+    assert running() == {}
+    assert run("stop") == 1
+
+def test_apply_replaces_running_instances(env):
+    assert run("apply", "main", "pad") == 0
+    assert set(running()) == {"main", "pad"}
+    assert run("apply", "clash") == 0
+    assert set(running()) == {"clash"}
+
+def test_apply_stops_started_instances_when_one_fails(env, monkeypatch, capsys):
+    popen = subprocess.Popen
+    calls = []
+    started = []
+
+    def failing_popen(cmd, **kwargs):
+        calls.append(cmd)
+        if len(calls) == 2:
+            raise FileNotFoundError(2, "No such file or directory", "xremap")
+        started.append(popen(cmd, **kwargs))
+        return started[-1]
+
+    monkeypatch.setattr(cli.subprocess, "Popen", failing_popen)
+    assert run("apply", "main", "pad") == 1
+    assert "failed to start xremap for 'pad'" in capsys.readouterr().err
+    assert len(calls) == 2
+    assert started[0].returncode is not None
+    assert cli.session_pid_files() == {}
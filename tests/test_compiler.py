@@ -0,0 +1,63 @@
+from xremap_gui.compiler import compile_profiles, describe_conflict, normalize_combo
+
+KEYBOARD = "/dev/input/event3"
+MACRO_PAD = "/dev/input/event7"
+
+def resolve(identities):
+    return [f"/dev/input/{identity}" for identity in identities]
+
+def profile(name, remap, application=None, modmap=None):
+    keymap = {"name": name, "remap": remap}
+    if application:
+        keymap["application"] = {"only": application}
+    result = {"keymap": [keymap]}
+    if modmap:
+        result["modmap"] = modmap
+    return result
+
+def test_normalize_combo():
+    assert normalize_combo("Shift-Ctrl_L-a") == normalize_combo("C-S-A") == "C-SHIFT-A"
+
+def test_each_profile_keeps_its_devices():
+    config, devices, conflicts = compile_profiles([
+        ("main", profile("main", {"C-A": "HOME"}, modmap=[{"name": "caps", "remap": {"CAPSLOCK": "ESC"}}]), ["event3"]),
+        ("pad", profile("pad", {"C-A": "F13"}), ["event7"]),
+    ], resolve)
+    assert devices == ["event3", "event7"]
+    assert [(k["name"], k["device"]) for k in config["keymap"]] == [
+        ("main: main", {"only": [KEYBOARD]}),
+        ("pad: pad", {"only": [MACRO_PAD]}),
+    ]
+    assert config["modmap"] == [{"name": "caps", "remap": {"CAPSLOCK": "ESC"}, "device": {"only": [KEYBOARD]}}]
+    # The same combo on different devices is not a conflict.
+    assert conflicts == []
+
+def test_conflicts_on_a_shared_device():
+    config, devices, conflicts = compile_profiles([
+        ("main", profile("main", {"C-A": "HOME", "C-E": "END"}), ["event3"]),
+        ("emacs", profile("emacs", {"Ctrl-a": "HOME", "C-E": "C-END"}), ["event3", "event7"]),
+    ], resolve)
+    assert devices == ["event3", "event7"]
+    assert [(c.combo, c.first_profile, c.profile) for c in conflicts] == [("C-E", "main", "emacs")]
+    assert describe_conflict(conflicts[0]) == "C-E: 'main' → END, 'emacs' → C-END"
+
+def test_profile_without_devices_applies_everywhere():
+    config, _, conflicts = compile_profiles([
+        ("main", profile("main", {"C-A": "HOME"}), ["event3"]),
+        ("global", profile("global", {"C-A": "END"}), []),
+    ], resolve)
+    assert "device" not in config["keymap"][1]
+    assert len(conflicts) == 1
+
+def test_app_keymaps_come_first_and_scope_conflicts():
+    config, _, conflicts = compile_profiles([
+        ("main", profile("main", {"C-A": "HOME"}), ["event3"]),
+        ("term", profile("term", {"C-A": "END"}, application="Alacritty"), ["event3"]),
+    ], resolve)
+    assert [k["name"] for k in config["keymap"]] == ["term: term", "main: main"]
+    assert conflicts == []
+
+def test_keeps_an_explicit_device_filter():
+    explicit = {"keymap": [{"name": "x", "device": {"not": ["Mouse"]}, "remap": {"A": "B"}}]}
+    config, _, _ = compile_profiles([("x", explicit, ["event3"])], resolve)
+    assert config["keymap"][0]["device"] == {"not": ["Mouse"]}
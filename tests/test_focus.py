@@ -0,0 +1,93 @@
+import io
+import threading
+
+import pytest
+
+from xremap_gui.focus import FocusTracker, build_lookup_table
+
+APP_PROFILES = {
+    "Navigator.firefox": "browser",
+    "org.gnome.Nautilus": "files",
+    "Alacritty": "terminal",
+}
+WINDOWS = {
+    "0x1": "Navigator.firefox",
+    "0x2": "Devtools.firefox",
+    "0x3": "org.gnome.Nautilus.org.gnome.Nautilus",
+    "0x4": "nautilus.org.gnome.Nautilus",
+    "0x5": "Alacritty.Alacritty",
+    "0x6": "gimp.Gimp",
+    "0x7": "alacritty.Other",
+}
+
+def active(win_id):
+    return f"_NET_ACTIVE_WINDOW(WINDOW): window id # {win_id}\n"
+
+@pytest.fixture
+def switches():
+    return []
+
+@pytest.fixture
+def tracker(switches):
+    return FocusTracker(lambda profile, wm_class: switches.append((profile, wm_class)), APP_PROFILES, WINDOWS)
+
+def test_lookup_table_keeps_targets_as_written():
+    assert build_lookup_table({"Navigator.Firefox": "a", "Code": "b"}) == {"navigator.firefox": "a", "code": "b"}
+
+@pytest.mark.parametrize("wm_class, profile", [
+    ("Navigator.firefox", "browser"),  # exact instance.class
+    ("navigator.Firefox", "browser"),  # case-insensitive
+    ("Devtools.firefox", None),  # the target names one instance only
+    ("Alacritty.Alacritty", "terminal"),  # the class alone
+    ("alacritty.Other", None),  # the instance alone never matches
+    ("org.gnome.Nautilus.org.gnome.Nautilus", "files"),  # dotted class, dotted instance
+    ("nautilus.org.gnome.Nautilus", "files"),  # dotted class
+    ("gimp.Gimp", None),
+    (None, None),
+])
+def test_lookup(tracker, wm_class, profile):
+    assert tracker.lookup(wm_class) == profile
+
+def test_switches_only_on_change(tracker, switches):
+    for win_id in ("0x1", "0x1", "0x2", "0x6", "0x3", "0x4", "0x5", "0x7"):
+        tracker.handle_line(active(win_id))
+    assert switches == [
+        ("browser", "Navigator.firefox"),
+        (None, "Devtools.firefox"),
+        ("files", "org.gnome.Nautilus.org.gnome.Nautilus"),
+        ("terminal", "Alacritty.Alacritty"),
+        (None, "alacritty.Other"),
+    ]
+
+def test_ignores_other_lines(tracker, switches):
+    tracker.handle_line("_NET_ACTIVE_WINDOW(WINDOW): window id # 0x0\n")
+    tracker.handle_line("garbage\n")
+    assert switches == []
+
+def test_reads_an_event_source(switches):
+    source = io.StringIO(active("0x1") + active("0x5") + active("0x5") + active("0x6"))
+    tracker = FocusTracker(lambda profile, wm_class: switches.append(profile), APP_PROFILES, WINDOWS, source=source)
+    assert tracker.start()
+    tracker.thread.join(5)
+    assert switches == ["browser", "terminal", None]
+
+def test_stop_drops_later_lines(switches):
+    tracker = None
+    threads = []
+    stopped = threading.Event()
+
+    def source():
+        yield active("0x1")
+        threads.append(threading.current_thread())
+        tracker.stop()
+        stopped.set()
+        yield active("0x5")
+
+    tracker = FocusTracker(lambda profile, wm_class: switches.append(profile), APP_PROFILES, WINDOWS, source=source())
+    assert tracker.start()
+    # stop() is called from the tracker thread itself, which a join would have deadlocked.
+    assert stopped.wait(5)
+    threads[0].join(5)
+    assert not threads[0].is_alive()
+    assert tracker.thread is None
+    assert switches == ["browser"]
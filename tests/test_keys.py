@@ -0,0 +1,33 @@
+import pytest
+
+from xremap_gui.keys import evdev_to_keysym, format_combo, keysym_to_evdev, parse_combo
+
+@pytest.mark.parametrize("digit", list("1234567890"))
+def test_digit_round_trip(digit):
+    assert keysym_to_evdev(digit) == digit
+    assert evdev_to_keysym(digit) == digit
+    assert parse_combo(format_combo(f"Ctrl+{digit}")) == f"Ctrl+{digit}"
+
+@pytest.mark.parametrize("keysym, shifted, name", [
+    ("minus", "underscore", "MINUS"),
+    ("equal", "plus", "EQUAL"),
+    ("bracketleft", "braceleft", "LEFTBRACE"),
+    ("semicolon", "colon", "SEMICOLON"),
+    ("apostrophe", "quotedbl", "APOSTROPHE"),
+    ("grave", "asciitilde", "GRAVE"),
+    ("backslash", "bar", "BACKSLASH"),
+    ("comma", "less", "COMMA"),
+    ("period", "greater", "DOT"),
+    ("slash", "question", "SLASH"),
+    ("1", "exclam", "1"),
+    ("9", "parenleft", "9"),
+])
+def test_shifted_symbols_map_to_the_unshifted_key(keysym, shifted, name):
+    assert keysym_to_evdev(keysym) == name
+    assert keysym_to_evdev(shifted) == name
+    assert evdev_to_keysym(name) == keysym
+
+def test_letters_and_key_prefix():
+    assert format_combo("Ctrl+Shift+a") == "C-Shift-A"
+    assert parse_combo("C-Shift-A") == "Ctrl+Shift+a"
+    assert evdev_to_keysym("KEY_ESC") == "Escape"
@@ -0,0 +1,33 @@
+from xremap_gui.layers import build_profile, split_layers, toggle_collisions, validate_profile
+
+def test_layers_round_trip():
+    layers = [("nav", "C-SPACE", {"H": "LEFT", "L": "RIGHT"}), ("num", "M-N", {"J": "1"})]
+    profile = build_profile("p", "", {"CAPSLOCK": "ESC"}, layers)
+    assert toggle_collisions({"CAPSLOCK": "ESC"}, layers) == []
+    assert validate_profile(profile) == []
+    _, base_remap, parsed, extra = split_layers(profile)
+    assert base_remap == {"CAPSLOCK": "ESC"}
+    assert parsed == layers
+    assert extra == []
+
+def test_toggle_bound_in_base():
+    layers = [("nav", "C-SPACE", {"H": "LEFT"})]
+    base = {"C-SPACE": "ENTER"}
+    issues = toggle_collisions(base, layers)
+    assert [(i.kind, i.mode, i.combo) for i in issues] == [("toggle", "nav", "C-SPACE")]
+    # The dropped toggle also leaves the layer unreachable.
+    profile = build_profile("p", "", base, layers)
+    assert [i.kind for i in validate_profile(profile)] == ["dead"]
+    # Combos are compared the way xremap reads them, not by spelling.
+    assert [i.kind for i in toggle_collisions({"CTRL-SPACE": "ENTER"}, layers)] == ["toggle"]
+
+def test_toggle_shared_by_two_layers():
+    layers = [("nav", "C-SPACE", {"H": "LEFT"}), ("num", "C-SPACE", {"J": "1"})]
+    issues = toggle_collisions({}, layers)
+    assert [(i.kind, i.mode) for i in issues] == [("toggle", "num")]
+    assert "'nav'" in issues[0].message
+
+def test_toggle_bound_inside_layer():
+    layers = [("nav", "C-SPACE", {"C-SPACE": "ENTER"})]
+    issues = toggle_collisions({}, layers)
+    assert [(i.kind, i.mode) for i in issues] == [("toggle", "nav")]
@@ -0,0 +1,90 @@
+import os
+
+import pytest
+
+from xremap_gui.macros import EV_KEY, EV_SYN, INPUT_EVENT, KEY_PRESS, KEY_RELEASE, KEY_REPEAT, SYN_DROPPED, Macro, MacroRecorder
+
+EV_MSC = 0x04
+KEY_A, KEY_LEFTCTRL, KEY_C, KEY_LEFTSHIFT = 30, 29, 46, 42
+
+def event(t_us, ev_type, code, value):
+    return INPUT_EVENT.pack(t_us // 1000000, t_us % 1000000, ev_type, code, value)
+
+def key(t_us, code, value):
+    # The kernel follows every key event with a SYN_REPORT.
+    return event(t_us, EV_KEY, code, value) + event(t_us, EV_SYN, 0, 0)
+
+# Ctrl+C with a held repeat, then Shift pressed and still down when recording stops.
+STREAM = b"".join([
+    key(900000, KEY_A, KEY_RELEASE),  # held before recording started
+    key(1000000, KEY_LEFTCTRL, KEY_PRESS),
+    event(1000500, EV_MSC, 4, 0x1d),
+    key(1000500, KEY_C, KEY_PRESS),
+    key(1250500, KEY_C, KEY_REPEAT),
+    key(1300500, KEY_C, KEY_RELEASE),
+    event(1350000, EV_SYN, SYN_DROPPED, 0),
+    key(1400500, KEY_LEFTCTRL, KEY_RELEASE),
+    key(2000000, KEY_LEFTSHIFT, KEY_PRESS),
+])
+
+def record(stream, keep_repeats=False):
+    # A pipe stands in for /dev/input/eventN: the recorder reads the whole stream, then sees end of file.
+    read_fd, write_fd = os.pipe()
+    try:
+        os.write(write_fd, stream)
+        os.close(write_fd)
+        recorder = MacroRecorder(f"/proc/self/fd/{read_fd}", keep_repeats)
+        assert recorder.start(), recorder.error
+        recorder.thread.join(5)
+        return recorder, recorder.stop()
+    finally:
+        os.close(read_fd)
+
+@pytest.fixture(autouse=True)
+def proc_fd():
+    if not os.path.isdir("/proc/self/fd"):
+        pytest.skip("needs /proc/self/fd")
+
+def test_records_key_events_with_delays():
+    recorder, macro = record(STREAM)
+    assert list(macro.events()) == [
+        (KEY_LEFTCTRL, KEY_PRESS, 0),
+        (KEY_C, KEY_PRESS, 500),
+        (KEY_C, KEY_RELEASE, 300000),
+        (KEY_LEFTCTRL, KEY_RELEASE, 100000),
+        (KEY_LEFTSHIFT, KEY_PRESS, 599500),
+        (KEY_LEFTSHIFT, KEY_RELEASE, 0),
+    ]
+    assert recorder.dropped == 1
+    assert recorder.error is None
+
+def test_keeps_repeats_when_asked():
+    _, macro = record(STREAM, keep_repeats=True)
+    assert list(macro.events())[1:4] == [
+        (KEY_C, KEY_PRESS, 500),
+        (KEY_C, KEY_REPEAT, 250000),
+        (KEY_C, KEY_RELEASE, 50000),
+    ]
+
+def test_emits_xremap_sequence():
+    _, macro = record(STREAM)
+    sequence = [
+        {"press": "LEFTCTRL"},
+        # 0.5 ms is below MIN_SLEEP_US and left to xremap.
+        {"press": "C"},
+        {"sleep": 300},
+        {"release": "C"},
+        {"sleep": 100},
+        {"release": "LEFTCTRL"},
+        {"sleep": 600},
+        {"press": "LEFTSHIFT"},
+        {"release": "LEFTSHIFT"},
+    ]
+    assert macro.to_sequence() == sequence
+    assert Macro.from_sequence(sequence).to_sequence() == sequence
+
+def test_bytes_round_trip():
+    _, macro = record(STREAM, keep_repeats=True)
+    assert Macro.from_bytes(macro.to_bytes()) == macro
+    with pytest.raises(ValueError):
+        Macro.from_bytes(b"XXXX" + macro.to_bytes()[4:])
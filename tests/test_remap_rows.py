@@ -0,0 +1,40 @@
+from xremap_gui.remap_list import RemapRows, pairs_to_remap, remap_to_pairs
+
+def load(model, remap):
+    model.sync(remap_to_pairs(remap))
+    return pairs_to_remap(model.items())
+
+def test_sync_keeps_unchanged_rows():
+    model = RemapRows()
+    load(model, {"C-X": "C-C", "F1": "HOME"})
+    model.mark_saved()
+    assert model.sync(remap_to_pairs({"F1": "HOME", "C-X": "C-C"})) == 0
+    assert not model.modified()
+    assert model.sync(remap_to_pairs({"F1": "END", "C-X": "C-C"})) == 2
+    assert pairs_to_remap(model.items()) == {"C-X": "C-C", "F1": "END"}
+
+def test_sync_keeps_sequence_order():
+    model = RemapRows()
+    load(model, {"C-X": "C-C", "F1": "HOME"})
+    model.mark_saved()
+    assert load(model, {"F1": "HOME", "C-X": ["C-A", "C-C"]}) == {"F1": "HOME", "C-X": ["C-A", "C-C"]}
+    assert model.modified()
+    model.mark_saved()
+    assert load(model, {"C-X": ["C-C", "C-A"], "F1": "HOME"}) == {"F1": "HOME", "C-X": ["C-C", "C-A"]}
+
+def test_reorder_within_a_sequence_is_a_modification():
+    model = RemapRows()
+    load(model, {"C-X": ["C-A", "C-C"], "F1": "HOME"})
+    model.mark_saved()
+    model.from_keys.reverse()
+    model.to_keys.reverse()
+    assert model.modified()
+    # Moving whole bindings around is not.
+    model.from_keys.reverse()
+    model.to_keys.reverse()
+    model.from_keys.append(model.from_keys.pop(0))
+    model.to_keys.append(model.to_keys.pop(0))
+    model.from_keys.append(model.from_keys.pop(0))
+    model.to_keys.append(model.to_keys.pop(0))
+    assert list(model.items())[0][0] == "F1"
+    assert not model.modified()
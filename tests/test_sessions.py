@@ -0,0 +1,74 @@
+import threading
+import time
+
+import pytest
+
+from xremap_gui.sessions import SessionError, SessionManager, device_conflicts
+from xremap_gui.supervisor import XRemapSupervisor
+
+KEYBOARD = "/dev/input/event3"
+MACRO_PAD = "/dev/input/event7"
+# Ignores SIGTERM like a wedged xremap, so only the shutdown deadline ends it.
+STUBBORN = ["sh", "-c", "trap '' TERM; echo ready; exec sleep 30"]
+
+class FakeSupervisor:
+    def __init__(self, on_state=None, on_line=None):
+        self.cmd = None
+        self.proc = None
+        self.started = []
+
+    @property
+    def running(self):
+        return self.cmd is not None
+
+    def start(self, cmd):
+        self.cmd = list(cmd)
+        self.started.append(self.cmd)
+
+    def stop(self):
+        self.cmd = None
+
+def test_device_conflicts():
+    groups = [("main", [KEYBOARD]), ("pad", [MACRO_PAD]), ("other", [MACRO_PAD, KEYBOARD])]
+    assert device_conflicts(groups) == [(MACRO_PAD, "pad", "other"), (KEYBOARD, "main", "other")]
+
+def test_start_all_rejects_a_device_owned_by_a_running_session():
+    manager = SessionManager(supervisor_factory=FakeSupervisor)
+    manager.start("main", ["xremap", "main.yml"], [KEYBOARD])
+    with pytest.raises(SessionError, match="'main'"):
+        manager.start_all([("pad", ["xremap", "pad.yml"], [MACRO_PAD]), ("games", ["xremap", "games.yml"], [KEYBOARD])])
+    # Nothing from the rejected batch was started.
+    assert "pad" not in manager or not manager["pad"].active
+    assert "games" not in manager or not manager["games"].active
+    assert manager.owner(KEYBOARD) == "main"
+
+def test_start_all_rejects_a_device_selected_twice():
+    manager = SessionManager(supervisor_factory=FakeSupervisor)
+    with pytest.raises(SessionError, match="both 'pad' and 'games'"):
+        manager.start_all([("pad", ["xremap"], [MACRO_PAD]), ("games", ["xremap"], [MACRO_PAD])])
+    assert manager.status() == []
+
+def test_restarting_a_session_keeps_its_devices():
+    manager = SessionManager(supervisor_factory=FakeSupervisor)
+    manager.start("main", ["xremap", "a.yml"], [KEYBOARD])
+    manager.start_all([("main", ["xremap", "b.yml"], [KEYBOARD]), ("pad", ["xremap", "pad.yml"], [MACRO_PAD])])
+    assert manager.supervisor("main").started == [["xremap", "a.yml"], ["xremap", "b.yml"]]
+    assert manager.conflicts("games", [MACRO_PAD]) == [(MACRO_PAD, "pad", "games")]
+    manager.stop("pad")
+    assert manager.conflicts("games", [MACRO_PAD]) == []
+
+def test_shutdown_shares_one_deadline():
+    ready = threading.Semaphore(0)
+    manager = SessionManager(on_line=lambda name, line: ready.release() if line == "ready" else None,
+                             supervisor_factory=lambda on_state, on_line: XRemapSupervisor(on_state, on_line, stop_timeout=30))
+    names = ["a", "b", "c"]
+    manager.start_all([(name, STUBBORN, []) for name in names])
+    for _ in names:
+        assert ready.acquire(timeout=5)
+    procs = [manager.supervisor(name).proc for name in names]
+    started = time.monotonic()
+    manager.shutdown(timeout=1.0)
+    elapsed = time.monotonic() - started
+    # Waiting on each instance in turn would take 3 s.
+    assert 1.0 <= elapsed < 2.0
+    assert all(proc.returncode is not None for proc in procs)
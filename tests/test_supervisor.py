@@ -0,0 +1,114 @@
+import queue
+import time
+
+import pytest
+
+from xremap_gui.supervisor import XRemapSupervisor
+
+def sh(script):
+    return ["sh", "-c", script]
+
+class States:
+    def __init__(self):
+        self.events = queue.Queue()
+        self.seen = []
+
+    def __call__(self, state):
+        self.events.put((state, time.monotonic()))
+
+    def wait_for(self, state, timeout=5):
+        # Returns the time of the next 'state', keeping every state seen on the way.
+        deadline = time.monotonic() + timeout
+        while True:
+            seen, at = self.events.get(timeout=max(deadline - time.monotonic(), 0))
+            self.seen.append(seen)
+            if seen == state:
+                return at
+
+    def drain(self, wait):
+        time.sleep(wait)
+        while not self.events.empty():
+            self.seen.append(self.events.get()[0])
+        return self.seen
+
+@pytest.fixture
+def states():
+    return States()
+
+@pytest.fixture
+def supervisors():
+    started = []
+    yield started
+    for supervisor in started:
+        supervisor.shutdown(timeout=1)
+
+def supervisor(states, supervisors, **kwargs):
+    kwargs.setdefault("min_backoff", 0.05)
+    kwargs.setdefault("max_backoff", 0.2)
+    started = XRemapSupervisor(states, **kwargs)
+    supervisors.append(started)
+    return started
+
+def test_restarts_a_crash_with_exponential_backoff(states, supervisors):
+    sup = supervisor(states, supervisors)
+    sup.start(sh("echo starting; echo boom; exit 3"))
+    gaps = []
+    started = states.wait_for("started")
+    for _ in range(4):
+        exited = states.wait_for("exited")
+        assert exited >= started
+        started = states.wait_for("started")
+        gaps.append(started - exited)
+    assert sup.restarts >= 4
+    assert sup.last_exit == 3
+    assert sup.last_error == "boom"
+    sup.stop()
+    # 0.05, 0.1, 0.2 and then held at max_backoff.
+    for gap, delay in zip(gaps, (0.05, 0.1, 0.2, 0.2)):
+        assert delay <= gap < delay + 0.5
+
+def test_backoff_resets_after_a_stable_run(states, supervisors, tmp_path):
+    count = tmp_path / "count"
+    # The fourth run stays up longer than stable_after before it crashes.
+    script = (f"n=$(cat {count} 2>/dev/null || echo 0); n=$((n + 1)); echo $n > {count}; "
+              "[ $n -eq 4 ] && sleep 0.4; exit 1")
+    sup = supervisor(states, supervisors, max_backoff=1.0, stable_after=0.3)
+    sup.start(sh(script))
+    states.wait_for("started")
+    gaps = []
+    for _ in range(4):
+        exited = states.wait_for("exited")
+        gaps.append(states.wait_for("started") - exited)
+    sup.stop()
+    assert gaps[:3] == sorted(gaps[:3])
+    assert gaps[2] >= 0.2
+    # Without the reset this delay would be 0.4.
+    assert 0.05 <= gaps[3] < 0.3
+    assert sup.last_error == "xremap exited with status 1"
+
+def test_keeps_the_last_output_lines(states, supervisors):
+    lines = []
+    sup = XRemapSupervisor(states, lines.append, max_lines=3, min_backoff=5)
+    supervisors.append(sup)
+    sup.start(sh("for i in 1 2 3 4 5; do echo line$i; done; printf partial; exit 2"))
+    states.wait_for("exited")
+    assert lines == ["line1", "line2", "line3", "line4", "line5", "partial"]
+    assert list(sup.output) == ["line4", "line5", "partial"]
+    assert sup.last_error == "partial"
+    assert not sup.running
+
+def test_stop_cancels_a_pending_restart(states, supervisors):
+    sup = supervisor(states, supervisors, min_backoff=0.3)
+    sup.start(sh("exit 1"))
+    states.wait_for("exited")
+    sup.stop()
+    assert states.drain(0.6) == ["started", "exited", "stopped"]
+    assert not sup.running
+    assert sup.restarts == 0
+
+def test_failed_start(states, supervisors, tmp_path):
+    sup = supervisor(states, supervisors)
+    sup.start([str(tmp_path / "missing-xremap")])
+    assert states.drain(0) == ["failed", "stopped"]
+    assert "missing-xremap" in sup.last_error
+    assert sup.cmd is None
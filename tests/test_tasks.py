@@ -0,0 +1,43 @@
+import threading
+import time
+
+from xremap_gui.tasks import TaskRunner
+
+def wait_for(runner, tasks, timeout=5):
+    deadline = time.monotonic() + timeout
+    while any(task.state in ("pending", "running") for task in tasks):
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    runner.dispatch()
+
+def test_same_key_tasks_run_one_at_a_time():
+    runner = TaskRunner(lambda: None)
+    running = []
+    overlaps = []
+    done = []
+
+    def save(i):
+        if running:
+            overlaps.append(i)
+        running.append(i)
+        time.sleep(0.02)
+        running.pop()
+        return i
+
+    tasks = [runner.submit("Saving", lambda i=i: save(i), done.append, key="save:a") for i in range(4)]
+    wait_for(runner, tasks)
+    assert not overlaps
+    # Only the newest save reports back.
+    assert done == [3]
+    runner.shutdown()
+
+def test_shutdown_cancels_queued_tasks():
+    runner = TaskRunner(lambda: None, workers=1)
+    release = threading.Event()
+    ran = []
+    runner.submit("Blocking", release.wait)
+    queued = runner.submit("Queued", lambda: ran.append(True))
+    runner.shutdown()
+    release.set()
+    assert queued.future.cancelled()
+    assert not ran
@@ -0,0 +1,119 @@
+import os
+import queue
+import threading
+
+import pytest
+
+from xremap_gui.watch import DeviceWatcher
+
+# EV_KEY and KEY_A, enough for sysfs_capabilities to call the device a keyboard.
+KEYBOARD_CAPS = {"ev": "3", "key": "40000000"}
+
+@pytest.fixture
+def roots(tmp_path):
+    dev = tmp_path / "dev" / "input"
+    sys_root = tmp_path / "sys" / "class" / "input"
+    dev.mkdir(parents=True)
+    sys_root.mkdir(parents=True)
+    return dev, sys_root
+
+def plug(roots, event, name):
+    dev, sys_root = roots
+    device_dir = sys_root / event / "device"
+    (device_dir / "capabilities").mkdir(parents=True, exist_ok=True)
+    (device_dir / "name").write_text(name + "\n")
+    for field, value in KEYBOARD_CAPS.items():
+        (device_dir / "capabilities" / field).write_text(value + "\n")
+    (dev / event).touch()
+
+def unplug(roots, event):
+    dev, sys_root = roots
+    (dev / event).unlink()
+    for path in sorted((sys_root / event).rglob("*"), reverse=True):
+        path.rmdir() if path.is_dir() else path.unlink()
+    (sys_root / event).rmdir()
+
+def is_inotify(fd):
+    try:
+        return os.readlink(f"/proc/self/fd/{fd}") == "anon_inode:inotify"
+    except OSError:
+        return False
+
+class Changes:
+    # Folds the watcher's reports into {event: name}, the way the GUI rebuilds its device list.
+    def __init__(self):
+        self.devices = {}
+        self.reports = queue.Queue()
+
+    def __call__(self, added, removed):
+        self.reports.put((added, removed))
+
+    def wait_until(self, expected, timeout=5):
+        while self.devices != expected:
+            added, removed = self.reports.get(timeout=timeout)
+            for event in removed:
+                self.devices.pop(event, None)
+            for device in added:
+                assert device["include"]
+                self.devices[device["event"]] = device["name"]
+
+@pytest.fixture
+def watcher(roots):
+    changes = Changes()
+    dev, sys_root = roots
+    watcher = DeviceWatcher(changes, str(dev), str(sys_root))
+    if not watcher.start():
+        pytest.skip("needs inotify")
+    watcher.changes = changes
+    yield watcher
+    watcher.stop()
+
+def test_add_and_remove(roots, watcher):
+    plug(roots, "event3", "AT Translated Set 2 keyboard")
+    plug(roots, "event7", "Macro Keypad")
+    watcher.changes.wait_until({"event3": "AT Translated Set 2 keyboard", "event7": "Macro Keypad"})
+    unplug(roots, "event3")
+    watcher.changes.wait_until({"event7": "Macro Keypad"})
+
+def test_replug_reusing_the_event_node(roots, watcher):
+    plug(roots, "event3", "AT Translated Set 2 keyboard")
+    watcher.changes.wait_until({"event3": "AT Translated Set 2 keyboard"})
+    unplug(roots, "event3")
+    plug(roots, "event3", "Split Keyboard")
+    watcher.changes.wait_until({"event3": "Split Keyboard"})
+
+def test_ignores_nodes_without_a_device(roots, watcher):
+    dev, _ = roots
+    (dev / "mouse0").touch()
+    (dev / "event9").touch()
+    plug(roots, "event3", "AT Translated Set 2 keyboard")
+    watcher.changes.wait_until({"event3": "AT Translated Set 2 keyboard"})
+    assert watcher.changes.reports.empty()
+
+def test_stop_from_the_callback(roots):
+    threads = []
+    reports = []
+    stopped = threading.Event()
+    dev, sys_root = roots
+
+    def on_change(added, removed):
+        reports.append([device["event"] for device in added])
+        threads.append(threading.current_thread())
+        # A join here would wait on the thread making the call.
+        watcher.stop()
+        stopped.set()
+
+    watcher = DeviceWatcher(on_change, str(dev), str(sys_root))
+    if not watcher.start():
+        pytest.skip("needs inotify")
+    inotify_fd = watcher.fd
+    assert is_inotify(inotify_fd)
+    plug(roots, "event3", "AT Translated Set 2 keyboard")
+    assert stopped.wait(5)
+    threads[0].join(5)
+    assert not threads[0].is_alive()
+    assert watcher.thread is None and watcher.fd == -1
+    plug(roots, "event7", "Macro Keypad")
+    assert reports == [["event3"]]
+    # The watcher thread closed the inotify descriptor on its way out.
+    assert not is_inotify(inotify_fd)